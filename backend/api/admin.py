@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Product, Order, OrderItem, Payment
+from .models import User, Product, ProductVariant, Order, OrderItem, Payment
 
 # Register User Custom Admin
 @admin.register(User)
@@ -13,22 +13,31 @@ class CustomUserAdmin(UserAdmin):
         ('Custom Fields', {'fields': ('role',)}),
     )
 
+class ProductVariantInline(admin.TabularInline):
+    model = ProductVariant
+    extra = 0
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'price', 'stock_quantity', 'category', 'seller')
+    list_select_related = ('seller',)
     search_fields = ('name', 'description')
     list_filter = ('category', 'created_at')
+    inlines = [ProductVariantInline]
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    raw_id_fields = ('product', 'variant')
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'total_amount', 'status', 'created_at')
     list_filter = ('status', 'created_at')
+    list_select_related = ('user',)
     inlines = [OrderItemInline]
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('id', 'order', 'amount', 'status', 'created_at')
+    list_select_related = ('order__user',)
@@ -0,0 +1,193 @@
+"""
+Async catalog reads for the ASGI entry point (core/asgi.py).
+
+core/urls_async.py routes product list/detail, search, suggestions,
+categories and pages here, ahead of the DRF router. GET responses are the
+same bytes the DRF views produce: the views reuse their filters,
+serializers, keyset pagination and response cache, but evaluate querysets
+with the async ORM. A slow query then parks a coroutine instead of
+holding a worker.
+
+None of these reads depend on who is asking. A request with a valid JWT
+is served the same way: the token is verified and the user is never
+loaded. Everything else is handed to the DRF view, which runs in a thread:
+- writes
+- invalid tokens
+- the browsable API
+- anything the DRF view would answer with an error
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import cache as response_cache
+from .autocomplete import autocomplete
+from .facets import aindexed_facets
+from .models import PageContent, Product
+from .search import asearch_products
+from .serializers import PageContentSerializer, ProductRowSerializer, ProductSerializer
+from .views import CategoryViewSet, PageContentViewSet, ProductViewSet
+
+_renderer = JSONRenderer()
+_jwt = JWTAuthentication()
+
+
+class Fallback(Exception):
+    """Let the DRF view answer this request (404s, edge cases)."""
+
+
+def _servable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if settings.DEBUG and 'text/html' in request.META.get('HTTP_ACCEPT', ''):
+        # Browsable API
+        return False
+    header = _jwt.get_header(request)
+    if header is None:
+        return True
+    try:
+        raw_token = _jwt.get_raw_token(header)
+        if raw_token is not None:
+            _jwt.get_validated_token(raw_token)
+    except APIException:
+        # The DRF view renders the 401
+        return False
+    return True
+
+
+def async_read(fallback, namespaces=None):
+    """
+    Serve servable requests with the decorated coroutine, through the
+    response cache when `namespaces` is given, and all others with the DRF
+    view `fallback`.
+    """
+    def decorator(view_func):
+        async def view(request, *args, **kwargs):
+            if _servable(request):
+                async def produce():
+                    return await view_func(request, *args, **kwargs)
+                try:
+                    # Like CachedResponseMixin: requests with credentials bypass the cache
+                    if namespaces and 'HTTP_AUTHORIZATION' not in request.META:
+                        return await response_cache.acached_response(request, namespaces, produce)
+                    return await produce()
+                except (Fallback, APIException):
+                    pass
+            return await sync_to_async(fallback)(request, *args, **kwargs)
+
+        # Like DRF views; csrf_exempt() only wraps sync views in Django 4.2
+        view.csrf_exempt = True
+        view.__name__ = view.__qualname__ = view_func.__name__
+        return view
+    return decorator
+
+
+def _json(data):
+    return HttpResponse(_renderer.render(data), content_type='application/json')
+
+
+def _viewset(viewset_class, request, action, **kwargs):
+    """A DRF view instance for `request`, for its filters, serializer context and paginator."""
+    return viewset_class(
+        request=Request(request), args=(), kwargs=kwargs, format_kwarg=None,
+        action=action, action_map={'get': action},
+    )
+
+
+def _products(view, instances, many=False):
+    context = view.get_serializer_context()
+    return ProductSerializer(instances, many=many, fields=view.get_requested_fields(), context=context).data
+
+
+@async_read(
+    ProductViewSet.as_view({'get': 'list', 'post': 'create'}, basename='product', detail=False),
+    ProductViewSet.cache_namespaces,
+)
+async def product_list(request):
+    view = _viewset(ProductViewSet, request, 'list')
+    paginator = view.paginator
+    # Filtering can validate ids against the database (?seller=), so it runs in a thread
+    queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+    fields = view.get_requested_fields()
+
+    if fields is None or 'variants' in fields:
+        page = await paginator.apaginate_queryset(queryset, view.request, view)
+        data = _products(view, page if page is not None else [product async for product in queryset], many=True)
+    else:
+        # Same sparse row path as ProductViewSet.list
+        row_serializer = ProductRowSerializer(fields, view.request)
+        columns = set(row_serializer.columns_for(fields)) | set(view.ordering_fields)
+        queryset = queryset.prefetch_related(None).values(*columns)
+        page = await paginator.apaginate_queryset(queryset, view.request, view)
+        data = row_serializer.serialize(page if page is not None else [row async for row in queryset])
+
+    if page is not None:
+        data = paginator.get_paginated_response(data).data
+    return _json(data)
+
+
+@async_read(
+    ProductViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+                           basename='product', detail=True),
+    ProductViewSet.cache_namespaces,
+)
+async def product_detail(request, pk):
+    view = _viewset(ProductViewSet, request, 'retrieve', pk=pk)
+    queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+    try:
+        product = await queryset.aget(pk=pk)
+    except Product.DoesNotExist:
+        raise Fallback
+    return _json(_products(view, product))
+
+
+@async_read(ProductViewSet.as_view({'get': 'search'}, basename='product', detail=False), ProductViewSet.cache_namespaces)
+async def product_search(request):
+    query = request.GET.get('q', '')
+    if not query:
+        return _json([])
+    view = _viewset(ProductViewSet, request, 'search')
+    products = await asearch_products(query, limit=20, queryset=Product.objects.prefetch_related('product_variants'))
+    return _json(_products(view, products, many=True))
+
+
+@async_read(ProductViewSet.as_view({'get': 'suggestions'}, basename='product', detail=False))
+async def product_suggestions(request):
+    query = request.GET.get('q', '')
+    if not query:
+        return _json({"categories": [], "products": []})
+    # In-memory lookup; may rebuild the index from the database, hence the thread
+    return _json(await sync_to_async(autocomplete.suggest)(query))
+
+
+@async_read(CategoryViewSet.as_view({'get': 'list'}, basename='categories', detail=False), CategoryViewSet.cache_namespaces)
+async def category_list(request):
+    data = {}
+    for category in (await aindexed_facets())['categories']:
+        data[category['value']] = [sub['value'] for sub in category['subcategories']]
+    return _json(data)
+
+
+@async_read(
+    PageContentViewSet.as_view({'get': 'list', 'post': 'create'}, basename='pagecontent', detail=False),
+    PageContentViewSet.cache_namespaces,
+)
+async def page_list(request):
+    return _json([PageContentSerializer(page).data async for page in PageContent.objects.all()])
+
+
+@async_read(
+    PageContentViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+                               basename='pagecontent', detail=True),
+    PageContentViewSet.cache_namespaces,
+)
+async def page_detail(request, slug):
+    try:
+        page = await PageContent.objects.aget(slug=slug)
+    except PageContent.DoesNotExist:
+        raise Fallback
+    return _json(PageContentSerializer(page).data)
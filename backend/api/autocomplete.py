@@ -0,0 +1,197 @@
+"""
+In-memory prefix index behind /products/suggestions/.
+
+Each worker keeps a sorted array of (term, product slot) pairs built from
+product names (every word, so "sho" finds "Running Shoes"), brands and
+categories, and answers a prefix query with two bisects. Lookups never
+touch the database or the media files: images are kept as storage names
+and turned into plain (unversioned) URLs only for the products returned.
+
+Freshness: Product signals call `invalidate()`, which bumps a version
+number in the Django cache. Workers compare their build version with the
+cached one on lookup and, when it moved, rebuild in a background thread
+(at most every REBUILD_INTERVAL seconds) while requests keep using the
+previous index. With a shared cache backend this reaches every worker;
+with the default per-process cache the writing worker refreshes right away
+and the others within MAX_AGE seconds.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connections
+
+from .models import Product
+
+VERSION_KEY = 'autocomplete:version'
+AUTOCOMPLETE_FIELDS = ('name', 'brand', 'category', 'price', 'sale_price', 'discount_percentage', 'image')
+REBUILD_INTERVAL = getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 2)
+MAX_AGE = getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300)
+
+_HIGH = '\U0010ffff'
+
+
+def _image_url(name):
+    # Without the ?v= content hash of HashedMediaStorage, which reads the whole file
+    url = getattr(default_storage, 'unversioned_url', default_storage.url)
+    return url(name)
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+class PrefixIndex:
+    def __init__(self, products):
+        self.products = []
+        product_terms = []
+        categories = {}
+
+        for row in products:
+            slot = len(self.products)
+            self.products.append(self._payload(row))
+            name = _normalize(row['name'])
+            words = name.split(' ')
+            # Every word start in the name, weighted so that full-name prefixes sort first
+            for position in range(len(words)):
+                product_terms.append((' '.join(words[position:]), position, slot))
+            brand = _normalize(row['brand'])
+            if brand:
+                product_terms.append((brand, 1, slot))
+            category = row['category']
+            if category:
+                categories.setdefault(_normalize(category), category)
+
+        product_terms.sort()
+        self.product_keys = [term for term, _, _ in product_terms]
+        self.product_entries = [(position, slot) for _, position, slot in product_terms]
+
+        category_terms = []
+        for normalized, label in categories.items():
+            words = normalized.split(' ')
+            for position in range(len(words)):
+                category_terms.append((' '.join(words[position:]), label))
+        category_terms.sort()
+        self.category_keys = [term for term, _ in category_terms]
+        self.category_labels = [label for _, label in category_terms]
+
+    @staticmethod
+    def _payload(row):
+        return {
+            'id': str(row['id']),
+            'name': row['name'],
+            'brand': row['brand'],
+            'category': row['category'],
+            'price': str(row['price']),
+            'sale_price': str(row['sale_price']) if row['sale_price'] is not None else None,
+            'image': row['image'] or None,
+        }
+
+    def _product(self, slot):
+        product = dict(self.products[slot])
+        if product['image']:
+            product['image'] = _image_url(product['image'])
+        return product
+
+    @staticmethod
+    def _range(keys, prefix):
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + _HIGH)
+
+    def suggest(self, query, limit_products=5, limit_categories=3):
+        prefix = _normalize(query)
+        if not prefix:
+            return {'categories': [], 'products': []}
+
+        start, end = self._range(self.category_keys, prefix)
+        categories = []
+        for label in self.category_labels[start:end]:
+            if label not in categories:
+                categories.append(label)
+                if len(categories) >= limit_categories:
+                    break
+
+        start, end = self._range(self.product_keys, prefix)
+        best = {}
+        for position, slot in self.product_entries[start:end]:
+            if slot not in best or position < best[slot]:
+                best[slot] = position
+        ranked = sorted(best, key=lambda slot: (best[slot], self.products[slot]['name'].lower()))
+        return {
+            'categories': categories,
+            'products': [self._product(slot) for slot in ranked[:limit_products]],
+        }
+
+
+class Autocomplete:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._built_at = 0.0
+
+    def _current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            version = cache.get_or_set(VERSION_KEY, 1, timeout=None)
+        return version
+
+    def _stale(self, version):
+        if self._index is None:
+            return True
+        age = time.monotonic() - self._built_at
+        if version != self._version:
+            return age >= REBUILD_INTERVAL
+        return age >= MAX_AGE
+
+    def build(self, version=None):
+        if version is None:
+            version = self._current_version()
+        rows = Product.objects.order_by().values('id', 'name', 'brand', 'category', 'price', 'sale_price', 'image')
+        self._index = PrefixIndex(rows.iterator(chunk_size=2000))
+        self._version = version
+        self._built_at = time.monotonic()
+        return self._index
+
+    def get_index(self):
+        version = self._current_version()
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self.build(version)
+        elif self._stale(version) and self._lock.acquire(blocking=False):
+            # Swap in a new index when it is ready; this request answers from the current one
+            threading.Thread(target=self._rebuild, args=(version,), daemon=True).start()
+        return self._index
+
+    def _rebuild(self, version):
+        try:
+            self.build(version)
+        finally:
+            # The thread's own connections; with pooling this returns them to the pool
+            connections.close_all()
+            self._lock.release()
+
+    def suggest(self, query, **kwargs):
+        return self.get_index().suggest(query, **kwargs)
+
+    def invalidate(self):
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, timeout=None)
+        self._version = None
+
+
+autocomplete = Autocomplete()
+
+
+def warm_up():
+    """Build the index at worker start so the first keystroke doesn't pay for it."""
+    try:
+        autocomplete.build()
+    except DatabaseError:
+        # Tables may not exist yet (first deploy before migrate); build lazily instead
+        pass
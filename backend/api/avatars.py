@@ -0,0 +1,65 @@
+"""
+Avatar storage: uploads (or legacy base64 data URLs) are decoded with
+Pillow, re-encoded as JPEG at two sizes and written to media storage, so
+user rows only carry two short file paths.
+"""
+import base64
+import binascii
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+AVATAR_SIZE = 512
+THUMBNAIL_SIZE = 96
+JPEG_QUALITY = 85
+
+
+class InvalidAvatar(ValueError):
+    pass
+
+
+def decode_data_url(value):
+    """Bytes from a `data:image/...;base64,` string (or bare base64)."""
+    if ',' in value and value.startswith('data:'):
+        value = value.split(',', 1)[1]
+    try:
+        return base64.b64decode(value, validate=False)
+    except (binascii.Error, ValueError):
+        raise InvalidAvatar('Profile picture is not valid base64 data')
+
+
+def _render(image, size):
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def save_avatar(user, data, save=True):
+    """Store `data` (bytes or a file object) as the user's avatar and thumbnail."""
+    if hasattr(data, 'read'):
+        data = data.read()
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    except (UnidentifiedImageError, OSError):
+        raise InvalidAvatar('Profile picture is not a supported image')
+    except Image.DecompressionBombError:
+        raise InvalidAvatar('Profile picture dimensions are too large')
+
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    old_files = [field.name for field in (user.avatar, user.avatar_thumbnail) if field]
+
+    user.avatar.save(f'{user.pk}-{digest}.jpg', ContentFile(_render(image, AVATAR_SIZE)), save=False)
+    user.avatar_thumbnail.save(f'{user.pk}-{digest}.jpg', ContentFile(_render(image, THUMBNAIL_SIZE)), save=False)
+    user.profile_picture = None
+    if save:
+        user.save(update_fields=['avatar', 'avatar_thumbnail', 'profile_picture'])
+
+    storage = user.avatar.storage
+    for name in old_files:
+        if name not in (user.avatar.name, user.avatar_thumbnail.name):
+            storage.delete(name)
@@ -0,0 +1,173 @@
+"""
+Response cache for anonymous catalog reads.
+
+Cached entries are keyed by path, normalized query params, Accept header
+and the current version of every namespace the view depends on. Writes
+never delete entries; model signals bump the namespace version instead
+(see api/signals.py), which makes every older key unreachable at once and
+lets the cache backend expire them.
+
+Hits are answered before DRF authentication or the ORM run, with ETag and
+Last-Modified headers and 304 handling for conditional requests.
+
+A response built from replica reads right after a bump is not stored: the
+replica may not have the write yet (see core/db/routing.py).
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from core.db import routing
+
+KEY_PREFIX = 'respcache'
+PRODUCTS = 'products'
+PAGES = 'pages'
+REVIEWS = 'reviews'
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:ns:{namespace}'
+
+
+def get_versions(namespaces):
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+async def aget_versions(namespaces):
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = await cache.aget_many(keys)
+    missing = {key: 1 for key in keys if key not in found}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _bumped_key(namespace):
+    return f'{KEY_PREFIX}:ns:{namespace}:bumped'
+
+
+def bump(namespace):
+    """Invalidate every cached response that depends on `namespace`."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+    if routing.replicas():
+        cache.set(_bumped_key(namespace), time.time(), timeout=routing.sticky_seconds())
+
+
+def _replica_stale(namespaces):
+    """Whether a response built now may miss a write: replica reads right after a bump."""
+    if not routing.reading_replicas():
+        return False
+    return bool(cache.get_many([_bumped_key(namespace) for namespace in namespaces]))
+
+
+async def _areplica_stale(namespaces):
+    if not routing.reading_replicas():
+        return False
+    return bool(await cache.aget_many([_bumped_key(namespace) for namespace in namespaces]))
+
+
+def _cache_key(request, versions):
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    # Bodies carry absolute URLs (images, next/previous links), so host and scheme are part of the key
+    raw = repr((request.scheme, request.get_host(), request.path, params, request.META.get('HTTP_ACCEPT', ''), versions))
+    return f'{KEY_PREFIX}:resp:{hashlib.sha1(raw.encode("utf-8")).hexdigest()}'
+
+
+def _not_modified(request, entry):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return entry['etag'] in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and int(entry['last_modified']) <= if_modified_since
+
+
+def _entry(content, content_type):
+    return {
+        'content': content,
+        'content_type': content_type,
+        'etag': quote_etag(hashlib.md5(content).hexdigest()),
+        'last_modified': time.time(),
+    }
+
+
+def _build_response(request, entry):
+    if _not_modified(request, entry):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous GET/HEAD responses for `cache_actions` from the cache.
+
+    Views declare the namespaces their output depends on; requests carrying
+    credentials bypass the cache because permissions or the payload may
+    differ per user.
+    """
+    cache_namespaces = ()
+    cache_actions = ('list', 'retrieve')
+    cache_timeout = 300
+
+    def _is_cacheable(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if 'HTTP_AUTHORIZATION' in request.META:
+            return False
+        action_map = getattr(self, 'action_map', None) or {}
+        return action_map.get(request.method.lower()) in self.cache_actions
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.cache_namespaces or not self._is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = _cache_key(request, get_versions(self.cache_namespaces))
+        entry = cache.get(key)
+        if entry is not None:
+            return _build_response(request, entry)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        response.render()
+        entry = _entry(response.content, response['Content-Type'])
+        if not _replica_stale(self.cache_namespaces):
+            cache.set(key, entry, timeout=self.cache_timeout)
+        return _build_response(request, entry)
+
+
+async def acached_response(request, namespaces, produce, timeout=CachedResponseMixin.cache_timeout):
+    """
+    CachedResponseMixin for async views: awaits `produce()` on a miss and
+    stores its response when it is a 200. Shares entries with the DRF views.
+    """
+    key = _cache_key(request, await aget_versions(namespaces))
+    entry = await cache.aget(key)
+    if entry is not None:
+        return _build_response(request, entry)
+
+    response = await produce()
+    if response.status_code != 200:
+        return response
+    entry = _entry(response.content, response['Content-Type'])
+    if not await _areplica_stale(namespaces):
+        await cache.aset(key, entry, timeout=timeout)
+    return _build_response(request, entry)
@@ -0,0 +1,178 @@
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+
+from .models import Product, ProductFacet
+
+# Fields whose change moves a product between facet buckets. Saves that only
+# touch other columns (stock, display_order, ...) skip the index entirely.
+# Price buckets and on-sale follow the stored sale pricing (api/pricing.py).
+FACET_SOURCE_FIELDS = ('category', 'subcategory', 'brand', 'gender', 'effective_price', 'sale_price')
+
+# (label, min inclusive, max exclusive)
+PRICE_BUCKETS = (
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-250', 100, 250),
+    ('250-500', 250, 500),
+    ('500+', 500, None),
+)
+
+
+def price_bucket(price):
+    if price is None:
+        return None
+    try:
+        price = Decimal(str(price))
+    except InvalidOperation:
+        return None
+    for label, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return label
+    return None
+
+
+def facet_entries(values):
+    """
+    Return the (facet, parent, value) index keys for a product, given either a
+    Product instance or a dict of its FACET_SOURCE_FIELDS.
+    """
+    if not isinstance(values, dict):
+        values = {field: getattr(values, field) for field in FACET_SOURCE_FIELDS}
+
+    entries = []
+    category = values.get('category')
+    if category:
+        entries.append((ProductFacet.CATEGORY, '', category))
+        if values.get('subcategory'):
+            entries.append((ProductFacet.SUBCATEGORY, category, values['subcategory']))
+    if values.get('brand'):
+        entries.append((ProductFacet.BRAND, '', values['brand']))
+    if values.get('gender'):
+        entries.append((ProductFacet.GENDER, '', values['gender']))
+    bucket = price_bucket(values.get('effective_price'))
+    if bucket:
+        entries.append((ProductFacet.PRICE, '', bucket))
+    on_sale = 'true' if values.get('sale_price') is not None else 'false'
+    entries.append((ProductFacet.ON_SALE, '', on_sale))
+    return entries
+
+
+def apply_delta(removed, added):
+    """Move counts from the `removed` keys to the `added` keys."""
+    delta = Counter(added)
+    delta.subtract(Counter(removed))
+    changes = {key: count for key, count in delta.items() if count}
+    if not changes:
+        return
+
+    with transaction.atomic():
+        # Insert missing rows with ON CONFLICT DO NOTHING, so concurrent saves
+        # adding the same new brand or category don't collide on the unique key
+        ProductFacet.objects.bulk_create([
+            ProductFacet(facet=facet, parent=parent, value=value, count=0)
+            for (facet, parent, value), count in changes.items() if count > 0
+        ], ignore_conflicts=True)
+        # Sorted, so concurrent saves lock rows in the same order
+        for (facet, parent, value), count in sorted(changes.items()):
+            ProductFacet.objects.filter(facet=facet, parent=parent, value=value).update(count=F('count') + count)
+        ProductFacet.objects.filter(count__lte=0).delete()
+
+
+def rebuild_index():
+    """Recompute the whole index from the product table."""
+    counts = Counter()
+    for values in Product.objects.values(*FACET_SOURCE_FIELDS).iterator(chunk_size=2000):
+        counts.update(facet_entries(values))
+
+    with transaction.atomic():
+        ProductFacet.objects.all().delete()
+        ProductFacet.objects.bulk_create([
+            ProductFacet(facet=facet, parent=parent, value=value, count=count)
+            for (facet, parent, value), count in counts.items()
+        ], batch_size=1000)
+    return len(counts)
+
+
+def _bucket_rows(rows):
+    return sorted(rows, key=lambda row: (-row['count'], row['value']))
+
+
+def _price_rows(rows):
+    order = [label for label, _, _ in PRICE_BUCKETS]
+    rows = [row for row in rows if row['value'] in order]
+    return sorted(rows, key=lambda row: order.index(row['value']))
+
+
+def _shape(rows):
+    """Turn flat (facet, parent, value, count) rows into the API payload."""
+    grouped = {facet: [] for facet, _ in ProductFacet.FACET_CHOICES}
+    subcategories = {}
+    for row in rows:
+        if row['facet'] == ProductFacet.SUBCATEGORY:
+            subcategories.setdefault(row['parent'], []).append({'value': row['value'], 'count': row['count']})
+        else:
+            grouped[row['facet']].append({'value': row['value'], 'count': row['count']})
+
+    categories = _bucket_rows(grouped[ProductFacet.CATEGORY])
+    for category in categories:
+        category['subcategories'] = _bucket_rows(subcategories.get(category['value'], []))
+
+    on_sale = {row['value']: row['count'] for row in grouped[ProductFacet.ON_SALE]}
+    return {
+        'categories': categories,
+        'brands': _bucket_rows(grouped[ProductFacet.BRAND]),
+        'genders': _bucket_rows(grouped[ProductFacet.GENDER]),
+        'price_ranges': _price_rows(grouped[ProductFacet.PRICE]),
+        'on_sale': {'true': on_sale.get('true', 0), 'false': on_sale.get('false', 0)},
+    }
+
+
+def indexed_facets():
+    """Facet counts for the whole catalog, read straight from the index."""
+    return _shape(ProductFacet.objects.values('facet', 'parent', 'value', 'count'))
+
+
+async def aindexed_facets():
+    return _shape([row async for row in ProductFacet.objects.values('facet', 'parent', 'value', 'count')])
+
+
+def queryset_facets(queryset):
+    """Facet counts for a filtered queryset, computed with grouped aggregates."""
+    queryset = queryset.order_by().prefetch_related(None)
+    rows = []
+
+    def grouped(facet, field, parent_field=None):
+        fields = [field] + ([parent_field] if parent_field else [])
+        for row in queryset.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''}).values(*fields).annotate(count=Count('pk')):
+            rows.append({
+                'facet': facet,
+                'parent': row[parent_field] if parent_field else '',
+                'value': row[field],
+                'count': row['count'],
+            })
+
+    grouped(ProductFacet.CATEGORY, 'category')
+    grouped(ProductFacet.SUBCATEGORY, 'subcategory', 'category')
+    grouped(ProductFacet.BRAND, 'brand')
+    grouped(ProductFacet.GENDER, 'gender')
+
+    bucket = Case(
+        *[
+            When(Q(effective_price__gte=low) & (Q(effective_price__lt=high) if high is not None else Q()), then=Value(label))
+            for label, low, high in PRICE_BUCKETS
+        ],
+        output_field=CharField(),
+    )
+    for row in queryset.annotate(bucket=bucket).values('bucket').annotate(count=Count('pk')):
+        if row['bucket']:
+            rows.append({'facet': ProductFacet.PRICE, 'parent': '', 'value': row['bucket'], 'count': row['count']})
+
+    sale = Case(When(sale_price__isnull=False, then=Value('true')), default=Value('false'), output_field=CharField())
+    for row in queryset.annotate(sale=sale).values('sale').annotate(count=Count('pk')):
+        rows.append({'facet': ProductFacet.ON_SALE, 'parent': '', 'value': row['sale'], 'count': row['count']})
+
+    return _shape(rows)
@@ -0,0 +1,103 @@
+"""
+Product image renditions.
+
+Every stored product image (Product.image and media-hosted entries of
+`additional_images`) gets thumbnail/medium/large copies in WebP and JPEG.
+Rendering is CPU bound, so `render_renditions` runs in a process pool
+owned by the job worker (see the `generate_product_images` task); this
+module only imports Pillow at top level so pool processes start cheaply.
+
+Rendition paths are recorded in `Product.image_renditions`, keyed by the
+source file name:
+
+    {"products/shoe.jpg": {"thumb": {"width": 240, "webp": "...", "jpeg": "..."}, ...}}
+
+and the serializers turn them into `srcset` strings.
+"""
+import hashlib
+import io
+import posixpath
+from urllib.parse import urlparse
+
+from PIL import Image, ImageOps
+
+# Name -> bounding box edge in pixels, smallest first
+RENDITIONS = (('thumb', 240), ('medium', 640), ('large', 1280))
+FORMATS = (('webp', 'WEBP', 80), ('jpeg', 'JPEG', 82))
+RENDITION_ROOT = 'renditions'
+
+
+def render_renditions(data):
+    """
+    Encode `data` (original image bytes) at every rendition size and format.
+    Returns {name: {'width': int, 'webp': bytes, 'jpeg': bytes}}. Images are
+    never upscaled, so small sources yield identical, narrower renditions.
+    """
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    rendered = {}
+    for name, size in RENDITIONS:
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.LANCZOS)
+        entry = {'width': variant.width}
+        for key, fmt, quality in FORMATS:
+            buffer = io.BytesIO()
+            options = {'method': 4} if fmt == 'WEBP' else {'optimize': True, 'progressive': True}
+            variant.save(buffer, format=fmt, quality=quality, **options)
+            entry[key] = buffer.getvalue()
+        rendered[name] = entry
+    return rendered
+
+
+def rendition_name(source, rendition, key):
+    """Storage path for one rendition of `source`; stable for a given source."""
+    stem = posixpath.splitext(posixpath.basename(source))[0]
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    extension = 'jpg' if key == 'jpeg' else key
+    return f'{RENDITION_ROOT}/{digest}/{stem}-{rendition}.{extension}'
+
+
+def storage_name(url, media_url):
+    """
+    Storage name behind an `additional_images` entry, or None when it points
+    outside our media (external hosts, data URLs).
+    """
+    if not url or url.startswith('data:'):
+        return None
+    path = urlparse(url).path
+    if path.startswith(media_url):
+        return path[len(media_url):]
+    if not urlparse(url).scheme and not url.startswith('/'):
+        # Bare storage name, e.g. "products/foo.jpg"
+        return url
+    return None
+
+
+def image_sources(image, additional_images, media_url):
+    """Storage names of every image of a product that should have renditions."""
+    sources = [image] if image else []
+    for url in additional_images or []:
+        name = storage_name(url, media_url)
+        if name and name not in sources:
+            sources.append(name)
+    return sources
+
+
+def srcset(entry, build_url):
+    """
+    `srcset` strings for one source's renditions entry:
+    {'src': medium JPEG, 'jpeg': '... 240w, ...', 'webp': '... 240w, ...'}.
+    """
+    if not entry:
+        return None
+    result = {'src': build_url(entry.get('medium', entry.get('large', {})).get('jpeg', ''))}
+    for key, _, _ in FORMATS:
+        candidates = []
+        seen = set()
+        for name, _ in RENDITIONS:
+            rendition = entry.get(name)
+            if rendition and rendition['width'] not in seen:
+                seen.add(rendition['width'])
+                candidates.append(f"{build_url(rendition[key])} {rendition['width']}w")
+        result[key] = ', '.join(candidates)
+    return result
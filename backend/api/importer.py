@@ -0,0 +1,204 @@
+"""
+Streaming product import from a ZIP archive (one CSV plus images).
+
+The archive is indexed once, the CSV is read row by row and processed in
+chunks: each chunk is validated, inserted with one bulk_create, and its
+images are written to storage from a small thread pool. Memory stays
+bounded by the chunk size whatever the catalog size, and errors are
+reported per CSV line.
+
+bulk_create skips Product signals, so each chunk also updates the facet
+index and search index, queues image renditions and invalidates the
+catalog caches itself.
+"""
+import csv
+import io
+import posixpath
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import cache as response_cache
+from . import facets, jobs
+from .autocomplete import autocomplete
+from .models import Product
+from .search import get_search_backend
+
+CHUNK_SIZE = 500
+IMAGE_WORKERS = 4
+MAX_REPORTED_ERRORS = 1000
+
+GENDERS = {choice for choice, _ in Product._meta.get_field('gender').choices}
+
+
+class ArchiveError(Exception):
+    """The archive itself is unusable (as opposed to a bad row)."""
+
+
+def _is_junk(name):
+    return name.startswith('__MACOSX') or name.endswith('/')
+
+
+def _flag(value):
+    return (value or 'false').strip().lower() == 'true'
+
+
+class ProductImporter:
+    def __init__(self, archive, seller, chunk_size=CHUNK_SIZE, image_workers=IMAGE_WORKERS):
+        self.archive = archive
+        self.seller = seller
+        self.chunk_size = chunk_size
+        self.image_workers = image_workers
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+
+    def run(self):
+        try:
+            with zipfile.ZipFile(self.archive, 'r') as z:
+                names = [name for name in z.namelist() if not _is_junk(name)]
+                csv_name = next((name for name in names if name.endswith('.csv')), None)
+                if not csv_name:
+                    raise ArchiveError('No CSV file found in the ZIP archive.')
+
+                # Path and basename -> archive path, built once instead of rescanning per row
+                self.images = {name: name for name in names}
+                for name in names:
+                    self.images.setdefault(posixpath.basename(name), name)
+
+                with z.open(csv_name) as csv_file, ThreadPoolExecutor(self.image_workers) as pool:
+                    reader = csv.DictReader(io.TextIOWrapper(csv_file, encoding='utf-8-sig'))
+                    chunk = []
+                    for row in reader:
+                        chunk.append((reader.line_num, row))
+                        if len(chunk) >= self.chunk_size:
+                            self._process_chunk(z, pool, chunk)
+                            chunk = []
+                    if chunk:
+                        self._process_chunk(z, pool, chunk)
+        except zipfile.BadZipFile:
+            raise ArchiveError('Invalid ZIP file.')
+        except UnicodeDecodeError:
+            raise ArchiveError('The CSV file must be UTF-8 encoded.')
+
+        if self.created:
+            transaction.on_commit(self._invalidate_caches)
+        return self
+
+    def report(self):
+        errors = [f"Line {line}: {message}" for line, message in self.errors]
+        return {
+            'message': f'Successfully uploaded {self.created} products.',
+            'created': self.created,
+            'skipped': self.skipped,
+            'errors': errors,
+        }
+
+    def _error(self, line, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def _build(self, line, row):
+        name = (row.get('name') or '').strip()
+        price = (row.get('price') or '').strip()
+        if not name or not price:
+            # Same as before: rows without a name or price are silently skipped
+            self.skipped += 1
+            return None
+        try:
+            price = Decimal(price)
+            if price < 0:
+                raise InvalidOperation
+        except InvalidOperation:
+            self._error(line, f"invalid price '{row.get('price')}'")
+            return None
+        try:
+            stock = int(row.get('stock') or 0)
+            if stock < 0:
+                raise ValueError
+        except ValueError:
+            self._error(line, f"invalid stock '{row.get('stock')}'")
+            return None
+        gender = (row.get('gender') or 'Unisex').strip() or 'Unisex'
+        if gender not in GENDERS:
+            self._error(line, f"invalid gender '{gender}'")
+            return None
+
+        product = Product(
+            name=name[:255],
+            description=row.get('description') or '',
+            price=price,
+            stock_quantity=stock,
+            category=(row.get('category') or 'Uncategorized').strip()[:100],
+            subcategory=(row.get('subcategory') or '').strip()[:100],
+            brand=(row.get('brand') or 'Generic').strip()[:100],
+            seller=self.seller,
+            gender=gender,
+            is_featured=_flag(row.get('is_featured')),
+            is_popular=_flag(row.get('is_popular')),
+        )
+        # bulk_create skips save(), which normally fills in the stored prices
+        product.update_pricing()
+        return product
+
+    def _process_chunk(self, z, pool, chunk):
+        products = []
+        image_names = []
+        for line, row in chunk:
+            product = self._build(line, row)
+            if product is None:
+                continue
+            image_name = (row.get('image_filename') or '').strip()
+            if image_name and image_name not in self.images:
+                self._error(line, f"image '{image_name}' not found in archive")
+                image_name = ''
+            products.append(product)
+            image_names.append((line, image_name))
+        if not products:
+            return
+
+        with transaction.atomic():
+            Product.objects.bulk_create(products, batch_size=self.chunk_size)
+
+            # ZipFile reads aren't thread-safe, so read here and only write in the pool.
+            # At most two uploads per worker are in flight to keep memory bounded.
+            pending = deque()
+            with_images = []
+            for product, (line, image_name) in zip(products, image_names):
+                if image_name:
+                    data = z.read(self.images[image_name])
+                    target = posixpath.join('products', posixpath.basename(image_name))
+                    pending.append((pool.submit(default_storage.save, target, ContentFile(data)), product, line))
+                    if len(pending) >= self.image_workers * 2:
+                        self._collect(pending.popleft(), with_images)
+            while pending:
+                self._collect(pending.popleft(), with_images)
+            if with_images:
+                Product.objects.bulk_update(with_images, ['image'], batch_size=self.chunk_size)
+                jobs.enqueue('generate_product_images', {'product_ids': [str(product.pk) for product in with_images]})
+
+            added = []
+            for product in products:
+                added.extend(facets.facet_entries(product))
+            facets.apply_delta([], added)
+
+        get_search_backend().index_products(products)
+        self.created += len(products)
+
+    def _collect(self, upload, with_images):
+        future, product, line = upload
+        try:
+            product.image.name = future.result()
+            with_images.append(product)
+        except Exception as e:
+            self._error(line, f"could not store image: {e}")
+
+    @staticmethod
+    def _invalidate_caches():
+        autocomplete.invalidate()
+        response_cache.bump(response_cache.PRODUCTS)
@@ -0,0 +1,130 @@
+"""
+Database-backed background jobs.
+
+Handlers register with `@job('name')` and are queued with `enqueue()`.
+Payload keys listed in `redact` (secrets such as reset codes) are blanked
+once the job has succeeded or failed for good.
+`manage.py run_jobs` claims due jobs with SELECT ... FOR UPDATE SKIP LOCKED
+(plus a conditional UPDATE, so backends without row locks cannot double
+claim), runs them on a thread pool and retries failures with exponential
+backoff until `max_attempts`. Running jobs whose worker died are handed
+back to the queue after JOBS_STALE_AFTER seconds.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = getattr(settings, 'JOBS_BACKOFF_BASE', 10)
+BACKOFF_MAX = getattr(settings, 'JOBS_BACKOFF_MAX', 3600)
+STALE_AFTER = getattr(settings, 'JOBS_STALE_AFTER', 1800)
+
+_registry = {}
+
+
+REDACTED = '[redacted]'
+
+
+def job(name, redact=()):
+    """Register `func(payload)` as the handler for jobs called `name`."""
+    def decorator(func):
+        func.redact = tuple(redact)
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_handler(name):
+    # Handlers live in api/tasks.py; import lazily to avoid import cycles
+    from . import tasks  # noqa: F401
+    return _registry.get(name)
+
+
+def enqueue(name, payload=None, user=None, max_attempts=5, delay=0):
+    """
+    Queue a job and return it. Inside a transaction the row commits with
+    it, so workers never see jobs for data that was rolled back.
+    """
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by=user,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def requeue_stale():
+    cutoff = timezone.now() - timedelta(seconds=STALE_AFTER)
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_at=None, locked_by='', run_at=timezone.now()
+    )
+
+
+def claim(worker, limit=1):
+    """Mark up to `limit` due jobs as running for `worker` and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_at__lte=now)
+            .order_by('run_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+        claimed = []
+        for pk in candidates:
+            if Job.objects.filter(pk=pk, status='queued').update(status='running', locked_at=now, locked_by=worker):
+                claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at'))
+
+
+def run(job_obj):
+    """Execute one claimed job and record the outcome."""
+    handler = get_handler(job_obj.name)
+    job_obj.attempts += 1
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{job_obj.name}'")
+        result = handler(job_obj.payload)
+    except Exception:
+        job_obj.last_error = traceback.format_exc()
+        if job_obj.attempts >= job_obj.max_attempts or handler is None:
+            job_obj.status = 'failed'
+            logger.error("Job %s (%s) failed permanently", job_obj.pk, job_obj.name)
+        else:
+            job_obj.status = 'queued'
+            job_obj.run_at = timezone.now() + timedelta(seconds=backoff(job_obj.attempts))
+            logger.warning("Job %s (%s) failed, retrying at %s", job_obj.pk, job_obj.name, job_obj.run_at)
+    else:
+        job_obj.status = 'succeeded'
+        job_obj.result = result
+        job_obj.last_error = ''
+    job_obj.locked_at = None
+    job_obj.locked_by = ''
+    fields = ['status', 'result', 'last_error', 'attempts', 'run_at', 'locked_at', 'locked_by', 'updated_at']
+    secrets = [key for key in getattr(handler, 'redact', ()) if key in job_obj.payload]
+    if secrets and job_obj.status in ('succeeded', 'failed'):
+        # No further attempt needs them
+        job_obj.payload = {**job_obj.payload, **{key: REDACTED for key in secrets}}
+        fields.append('payload')
+    job_obj.save(update_fields=fields)
+    return job_obj
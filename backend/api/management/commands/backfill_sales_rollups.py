@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and monthly sales rollup tables from existing orders."
+
+    def handle(self, *args, **options):
+        rows = backfill()
+        self.stdout.write(self.style.SUCCESS(f"Sales rollups rebuilt ({rows} daily rows)."))
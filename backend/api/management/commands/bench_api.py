@@ -0,0 +1,345 @@
+import io
+import json
+import platform
+import random
+import tempfile
+import time
+import zipfile
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import jobs
+from api.autocomplete import autocomplete
+from api.management.commands.bench_asgi import percentile
+from api.models import Job, Order, OrderItem, Product, ProductVariant, Review
+from core.metrics import QueryTimer
+
+User = get_user_model()
+
+CATEGORIES = {
+    'Men': ['Tops', 'Jeans', 'Shoes', 'Outerwear'],
+    'Women': ['Dresses', 'Tops', 'Shoes', 'Bags'],
+    'Kids': ['Tops', 'Shoes', 'Toys'],
+    'Home': ['Kitchen', 'Decor'],
+}
+BRANDS = ['Nike', 'Puma', 'Zara', 'Levis', 'Uniqlo', 'Adidas', 'Mango', 'Ikea']
+ADJECTIVES = ['Classic', 'Slim', 'Relaxed', 'Vintage', 'Sport', 'Premium', 'Everyday', 'Organic']
+NOUNS = ['Shirt', 'Jeans', 'Jacket', 'Sneakers', 'Dress', 'Hoodie', 'Shorts', 'Boots', 'Cap', 'Sweater']
+GENDERS = ['Male', 'Female', 'Unisex']
+
+# Filter combinations the storefront sends, requested in rotation
+LIST_QUERIES = [
+    'view=card&page_size=24',
+    'view=card&page_size=24&category=Men',
+    'view=card&page_size=24&category=Women&subcategory=Shoes&ordering=effective_price',
+    'view=card&page_size=24&min_price=20&max_price=80&ordering=-effective_price',
+    'view=card&page_size=24&brand=Nike&on_sale=true',
+    'view=card&page_size=24&min_rating=4&ordering=-rating_avg',
+    'page_size=24&search=jacket',
+]
+# Run in this order; the bulk scenarios add products, so they go last
+SCENARIOS = (
+    'product_list', 'search', 'suggestions', 'product_detail',
+    'checkout', 'dashboard_stats', 'bulk_upload', 'bulk_import',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API against a freshly seeded throwaway database (a test database "
+        "next to the configured one). Every request goes through the full middleware "
+        "stack with an empty response cache. Reports p50/p95/p99 latency, queries per "
+        "request and throughput per scenario, writes them as JSON, and with --baseline "
+        "exits non-zero when a scenario regressed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Products to seed')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the dataset and request mix')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario')
+        parser.add_argument('--bulk-requests', type=int, default=10, help='Timed uploads/imports')
+        parser.add_argument('--bulk-rows', type=int, default=200, help='CSV rows per uploaded archive')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset to run')
+        parser.add_argument('--output', help='Results file (default benchmarks/api-<timestamp>.json)')
+        parser.add_argument('--baseline', help='Earlier results file to compare against')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative p95 increase')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore p95 increases smaller than this')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        if 'bulk_import' in scenarios and 'bulk_upload' not in scenarios:
+            raise CommandError('bulk_import imports the archives bulk_upload sends; run both.')
+        scenarios = [name for name in SCENARIOS if name in scenarios]
+        baseline = self.load(options['baseline']) if options['baseline'] else None
+        self.options = options
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                # Private to this run: never touch the shared cache or media of a real deployment
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                MEDIA_ROOT=media_root,
+                QUERY_BUDGET_MODE='off',
+            ):
+                started = time.perf_counter()
+                self.seed(options['products'], random.Random(options['seed']))
+                self.stdout.write(f"Seeded {options['products']} products in {time.perf_counter() - started:.1f}s")
+                results = {name: getattr(self, f'bench_{name}')() for name in scenarios}
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'products': options['products'],
+                'seed': options['seed'],
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'scenarios': results,
+        }
+        self.print_results(results)
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / f"api-{timezone.now():%Y%m%dT%H%M%SZ}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + '\n')
+        self.stdout.write(f"Results written to {output}")
+
+        if baseline is not None:
+            differing = [key for key in ('database', 'products', 'seed') if baseline.get('meta', {}).get(key) != report['meta'][key]]
+            if differing:
+                self.stderr.write(f"Baseline was run with a different {', '.join(differing)}; timings may not be comparable.")
+            regressions = self.compare(baseline, results)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}: " + '; '.join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}."))
+
+    def load(self, path):
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline {path}: {e}')
+
+    # Dataset
+
+    def seed(self, count, rng):
+        self.admin = User.objects.create_user(username='bench-admin', email='bench-admin@example.com', password='bench', role='admin')
+        self.customer = User.objects.create_user(username='bench-customer', email='bench-customer@example.com', password='bench')
+        reviewers = User.objects.bulk_create(
+            User(username=f'bench-reviewer-{i}', email=f'bench-reviewer-{i}@example.com') for i in range(50)
+        )
+
+        products = []
+        for i in range(count):
+            category = rng.choice(list(CATEGORIES))
+            product = Product(
+                seller=self.admin,
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}',
+                description=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS).lower()} for every day',
+                price=Decimal(rng.randint(500, 20000)) / 100,
+                category=category,
+                subcategory=rng.choice(CATEGORIES[category]),
+                brand=rng.choice(BRANDS),
+                gender=rng.choice(GENDERS),
+                # Enough that checkout never runs out
+                stock_quantity=1_000_000,
+                discount_percentage=rng.choice([0, 0, 0, 10, 20, 30]),
+                display_order=rng.randint(0, 1000),
+            )
+            product.update_pricing()
+            products.append(product)
+        # bulk_create skips signals; the indexes are rebuilt below
+        Product.objects.bulk_create(products, batch_size=1000)
+
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, sku=f'BENCH-{i}-{size}', size=size, stock=1_000_000)
+            for i, product in enumerate(products[::10]) for size in ('S', 'M', 'L')
+        ], batch_size=1000)
+
+        reviews = []
+        for product in rng.sample(products, len(products) // 5):
+            for reviewer in rng.sample(reviewers, rng.randint(1, 5)):
+                reviews.append(Review(product=product, user=reviewer, rating=rng.randint(1, 5), comment='Bench review'))
+        Review.objects.bulk_create(reviews, batch_size=1000)
+
+        now = timezone.now()
+        orders = Order.objects.bulk_create([
+            Order(user=self.customer, customer_name='Bench Customer', total_amount=0,
+                  status=rng.choice(['pending', 'shipped', 'delivered', 'delivered', 'cancelled']))
+            for _ in range(max(count // 5, 1))
+        ], batch_size=1000)
+        items = []
+        for order in orders:
+            order.created_at = now - timedelta(days=rng.randint(0, 364), minutes=rng.randint(0, 1439))
+            for product in rng.sample(products, rng.randint(1, 3)):
+                quantity = rng.randint(1, 3)
+                items.append(OrderItem(order=order, product=product, quantity=quantity, price_at_purchase=product.effective_price))
+                order.total_amount += product.effective_price * quantity
+        Order.objects.bulk_update(orders, ['created_at', 'total_amount'], batch_size=1000)
+        OrderItem.objects.bulk_create(items, batch_size=1000)
+
+        for command in ('rebuild_facets', 'rebuild_search_index', 'reconcile_ratings', 'backfill_sales_rollups'):
+            call_command(command, stdout=io.StringIO())
+        autocomplete.invalidate()
+
+        self.rng = rng
+        self.product_ids = [str(pk) for pk in Product.objects.order_by('name').values_list('id', flat=True)]
+        self.prices = dict((str(pk), str(price)) for pk, price in Product.objects.values_list('id', 'effective_price'))
+        self.client = Client()
+        self.auth = {
+            user.username: {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+            for user in (self.admin, self.customer)
+        }
+
+    # Scenarios
+
+    def run(self, request, expected, count=None, warmup=None):
+        """Time `request(i)`, which returns a status code, and summarize the timed calls."""
+        count = self.options['requests'] if count is None else count
+        warmup = self.options['warmup'] if warmup is None else warmup
+        latencies, queries, errors = [], [], 0
+        elapsed = 0.0
+        for i in range(warmup + count):
+            # Measure the work behind each response, not cache hits
+            cache.clear()
+            timer = QueryTimer()
+            with ExitStack() as stack:
+                for alias_connection in connections.all():
+                    stack.enter_context(alias_connection.execute_wrapper(timer))
+                started = time.perf_counter()
+                status = request(i)
+                took = time.perf_counter() - started
+            if i < warmup:
+                continue
+            elapsed += took
+            latencies.append(took * 1000)
+            queries.append(timer.count)
+            errors += status != expected
+
+        return {
+            'requests': count,
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0,
+            'throughput_rps': round(count / elapsed, 1) if elapsed else 0,
+            'queries_mean': round(sum(queries) / len(queries), 2) if queries else 0,
+            'queries_max': max(queries, default=0),
+        }
+
+    def bench_product_list(self):
+        return self.run(lambda i: self.client.get(f'/api/products/?{LIST_QUERIES[i % len(LIST_QUERIES)]}').status_code, 200)
+
+    def bench_search(self):
+        words = [noun.lower() for noun in NOUNS] + [adjective.lower() for adjective in ADJECTIVES]
+        return self.run(lambda i: self.client.get('/api/products/search/', {'q': words[i % len(words)]}).status_code, 200)
+
+    def bench_suggestions(self):
+        prefixes = [word[:length].lower() for word in NOUNS + BRANDS for length in (2, 4)]
+        return self.run(lambda i: self.client.get('/api/products/suggestions/', {'q': prefixes[i % len(prefixes)]}).status_code, 200)
+
+    def bench_product_detail(self):
+        ids = self.rng.sample(self.product_ids, min(len(self.product_ids), 100))
+        return self.run(lambda i: self.client.get(f'/api/products/{ids[i % len(ids)]}/').status_code, 200)
+
+    def bench_checkout(self):
+        def checkout(i):
+            lines = self.rng.sample(self.product_ids, self.rng.randint(1, 3))
+            payload = {
+                'totalPrice': '10.00',
+                'items': [{'id': pk, 'quantity': 1, 'price': self.prices[pk]} for pk in lines],
+            }
+            return self.client.post('/api/orders/', payload, content_type='application/json', **self.auth['bench-customer']).status_code
+        return self.run(checkout, 201)
+
+    def bench_dashboard_stats(self):
+        return self.run(lambda i: self.client.get('/api/dashboard/stats/', **self.auth['bench-admin']).status_code, 200)
+
+    def archive(self):
+        rows = io.StringIO()
+        rows.write('name,description,price,stock,category,subcategory,brand,gender\n')
+        for i in range(self.options['bulk_rows']):
+            category = self.rng.choice(list(CATEGORIES))
+            rows.write(
+                f"Imported {self.rng.choice(NOUNS)} {i},Bulk import,{self.rng.randint(500, 20000) / 100},10,"
+                f"{category},{self.rng.choice(CATEGORIES[category])},{self.rng.choice(BRANDS)},{self.rng.choice(GENDERS)}\n"
+            )
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('products.csv', rows.getvalue())
+        return buffer.getvalue()
+
+    def bench_bulk_upload(self):
+        content = self.archive()
+        self.import_jobs = []
+
+        def upload(i):
+            response = self.client.post(
+                '/api/products/bulk_upload/', {'file': SimpleUploadedFile('products.zip', content, 'application/zip')},
+                **self.auth['bench-admin'],
+            )
+            if response.status_code == 202:
+                self.import_jobs.append(response.json()['job']['id'])
+            return response.status_code
+        return self.run(upload, 202, count=self.options['bulk_requests'], warmup=1)
+
+    def bench_bulk_import(self):
+        """The job worker's side of bulk_upload: importing each uploaded archive."""
+        def run_import(i):
+            job = jobs.run(Job.objects.get(pk=self.import_jobs[i]))
+            return 200 if job.status == 'succeeded' and not job.result['errors'] else 500
+        return self.run(run_import, 200, count=len(self.import_jobs) - 1, warmup=1)
+
+    # Reporting
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'Scenario':<17}{'Requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}"
+            f"{'Queries':>9}{'Max q':>7}{'Errors':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<17}{result['requests']:>9}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                f"{result['throughput_rps']:>9.1f}{result['queries_mean']:>9.1f}{result['queries_max']:>7}{result['errors']:>8}"
+            )
+
+    def compare(self, baseline, results):
+        """Regressions of `results` against an earlier report, as messages."""
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get('scenarios', {}).get(name)
+            if before is None:
+                continue
+            allowed = before['p95_ms'] * (1 + self.options['threshold'])
+            if result['p95_ms'] > allowed and result['p95_ms'] - before['p95_ms'] >= self.options['min_delta_ms']:
+                regressions.append(f"{name} p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+            # Query counts don't depend on the machine, so any increase counts
+            if result['queries_max'] > before['queries_max']:
+                regressions.append(f"{name} queries {before['queries_max']} -> {result['queries_max']}")
+            if result['errors'] > before['errors']:
+                regressions.append(f"{name} errors {before['errors']} -> {result['errors']}")
+        return regressions
@@ -0,0 +1,185 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Product
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI and ASGI entry points in-process under the same load: "
+        "clients issuing catalog reads while slow clients download the full "
+        "catalog. WSGI requests queue for --wsgi-workers threads (a slow client "
+        "holds its worker until the download ends); ASGI requests share one event "
+        "loop. Reports p50/p95/p99 latency, queueing included, and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help='Concurrent clients doing catalog reads')
+        parser.add_argument('--requests', type=int, default=50, help='Reads per client')
+        parser.add_argument('--slow-clients', type=int, default=3, help='Clients downloading the full catalog slowly')
+        parser.add_argument('--slow-delay', type=float, default=0.5, help='Seconds a slow client takes to read a response')
+        parser.add_argument('--wsgi-workers', type=int, default=3, help='Sync workers, like gunicorn --workers')
+        parser.add_argument('--mode', choices=('both', 'wsgi', 'asgi'), default='both')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['requests'] < 1 or options['wsgi_workers'] < 1:
+            raise CommandError('--clients, --requests and --wsgi-workers must be at least 1')
+
+        products = list(Product.objects.order_by('display_order', '-created_at', 'id').values('id', 'name')[:20])
+        if not products:
+            raise CommandError('No products to read; seed the catalog first.')
+        word = products[0]['name'].split()[0].lower()
+        self.hot_paths = [('/api/products/', 'view=card&page_size=20'), ('/api/categories/', '')]
+        self.hot_paths += [(f"/api/products/{product['id']}/", '') for product in products[:5]]
+        self.hot_paths += [('/api/products/search/', f'q={word}'), ('/api/products/suggestions/', f'q={word[:2]}')]
+        self.slow_path = ('/api/products/', '')
+        self.host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+        self.options = options
+        # Imported here: both run start-up work (autocomplete warm-up) that must not run inside the event loop
+        from core.asgi import application as asgi_application
+        from core.wsgi import application as wsgi_application
+        self.asgi_application, self.wsgi_application = asgi_application, wsgi_application
+
+        self.stdout.write(
+            f"{options['clients']} clients x {options['requests']} reads, {options['slow_clients']} slow clients "
+            f"({options['slow_delay']}s per response), {options['wsgi_workers']} WSGI workers"
+        )
+        self.stdout.write(f"{'Mode':<6}{'Clients':<9}{'Requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'Errors':>8}")
+        if options['mode'] in ('both', 'wsgi'):
+            self.report('wsgi', *self.run_wsgi())
+        if options['mode'] in ('both', 'asgi'):
+            self.report('asgi', *asyncio.run(self.run_asgi()))
+
+    def report(self, mode, hot, slow, elapsed, errors):
+        for label, latencies in (('reads', hot), ('slow', slow)):
+            ms = [latency * 1000 for latency in latencies]
+            rate = len(latencies) / elapsed if label == 'reads' else 0
+            self.stdout.write(
+                f"{mode:<6}{label:<9}{len(ms):>9}{percentile(ms, 50):>9.1f}{percentile(ms, 95):>9.1f}"
+                f"{percentile(ms, 99):>9.1f}{rate:>9.1f}{errors if label == 'reads' else '':>8}"
+            )
+
+    def run_wsgi(self):
+        application = self.wsgi_application
+        options = self.options
+        hot, slow, errors = [], [], [0]
+        done = threading.Event()
+
+        def serve(path, query, delay):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+                'SERVER_NAME': self.host, 'SERVER_PORT': '80', 'HTTP_HOST': self.host, 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+                'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False, 'wsgi.version': (1, 0),
+            }
+            status = []
+            body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+            try:
+                for _ in body:
+                    pass
+                # A sync worker stays busy until the client has read the response
+                time.sleep(delay)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            return status[0].startswith('200')
+
+        with ThreadPoolExecutor(max_workers=options['wsgi_workers']) as pool:
+            def client(index):
+                for i in range(options['requests']):
+                    path, query = self.hot_paths[(index + i) % len(self.hot_paths)]
+                    started = time.perf_counter()
+                    ok = pool.submit(serve, path, query, 0).result()
+                    hot.append(time.perf_counter() - started)
+                    errors[0] += not ok
+
+            def slow_client():
+                while not done.is_set():
+                    started = time.perf_counter()
+                    pool.submit(serve, *self.slow_path, options['slow_delay']).result()
+                    slow.append(time.perf_counter() - started)
+
+            slow_threads = [threading.Thread(target=slow_client) for _ in range(options['slow_clients'])]
+            for thread in slow_threads:
+                thread.start()
+            started = time.perf_counter()
+            clients = [threading.Thread(target=client, args=(index,)) for index in range(options['clients'])]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            done.set()
+            for thread in slow_threads:
+                thread.join()
+        return hot, slow, elapsed, errors[0]
+
+    async def run_asgi(self):
+        application = self.asgi_application
+        options = self.options
+        hot, slow, errors = [], [], [0]
+        done = asyncio.Event()
+
+        async def serve(path, query, delay):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+                'query_string': query.encode(), 'headers': [(b'host', self.host.encode())],
+                'server': (self.host, 80), 'client': ('127.0.0.1', 0),
+            }
+            request_sent = False
+            status = []
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body') and delay:
+                    # The connection is held, but the event loop is free meanwhile
+                    await asyncio.sleep(delay)
+
+            await application(scope, receive, send)
+            return status[0] == 200
+
+        async def client(index):
+            for i in range(options['requests']):
+                path, query = self.hot_paths[(index + i) % len(self.hot_paths)]
+                started = time.perf_counter()
+                ok = await serve(path, query, 0)
+                hot.append(time.perf_counter() - started)
+                errors[0] += not ok
+
+        async def slow_client():
+            while not done.is_set():
+                started = time.perf_counter()
+                await serve(*self.slow_path, options['slow_delay'])
+                slow.append(time.perf_counter() - started)
+
+        slow_tasks = [asyncio.create_task(slow_client()) for _ in range(options['slow_clients'])]
+        started = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(options['clients'])))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*slow_tasks)
+        return hot, slow, elapsed, errors[0]
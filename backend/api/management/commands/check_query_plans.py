@@ -0,0 +1,230 @@
+import json
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import pricing
+from api.models import Order, Product, ProductVariant, Review
+from api.search import get_search_backend
+
+User = get_user_model()
+
+# Tables that must be reached through an index on every checked endpoint
+WATCHED_TABLES = ('api_product', 'api_productvariant', 'api_order', 'api_review')
+
+CATEGORIES = {
+    'Clothing': ['Shirts', 'Pants', 'Jackets', 'Dresses'],
+    'Shoes': ['Sneakers', 'Boots', 'Sandals'],
+    'Accessories': ['Bags', 'Belts', 'Hats', 'Watches'],
+    'Home': ['Kitchen', 'Decor', 'Bedding'],
+    'Sports': ['Fitness', 'Outdoor', 'Cycling'],
+}
+SIZES = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+COLORS = ['Black', 'White', 'Red', 'Blue', 'Green', 'Grey', 'Navy', 'Beige', 'Pink', 'Brown']
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large catalog inside a transaction, call the main catalog and order "
+        "endpoints, EXPLAIN every SELECT they run and fail if any of them reads "
+        f"{', '.join(WATCHED_TABLES)} with a sequential scan. The seed data is rolled back. "
+        "QueryPlanTests runs the same checks on a small catalog under `manage.py test`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--show-plans', action='store_true', help='Print every plan, not just failures')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded data instead of rolling back')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'EXPLAIN parsing is not implemented for {connection.vendor}.')
+
+        self.rng = random.Random(options['seed'])
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['products']} products and {options['orders']} orders...")
+            self.seed(options['products'], options['orders'])
+            failures = self.check_all(options['show_plans'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        if failures:
+            for label, table, sql in failures:
+                self.stderr.write(f"{label}: sequential scan on {table}\n    {sql[:300]}")
+            raise CommandError(f'{len(failures)} query plan regression(s) found.')
+        self.stdout.write(self.style.SUCCESS('No sequential scans on watched tables.'))
+
+    def check_all(self, show_plans=False):
+        """Plan failures, as (label, table, sql), for every checked path over the seeded data."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        failures = []
+        for label, url, user in self.endpoints():
+            failures.extend(self.check_endpoint(label, url, user, show_plans))
+        # The flash sale scheduler polls the whole catalog from the job worker
+        with CaptureQueriesContext(connection) as captured:
+            pricing.refresh_sales()
+            pricing.next_boundary()
+        failures.extend(self.check_plans('flash sale refresh', captured, show_plans))
+        return failures
+
+    def seed(self, product_count, order_count):
+        rng = self.rng
+        tag = uuid.uuid4().hex[:8]
+        self.seller = User.objects.create_user(username=f'plans-{tag}', email=f'plans-{tag}@example.com', password=uuid.uuid4().hex, role='admin')
+        self.customers = User.objects.bulk_create([
+            User(username=f'plans-{tag}-{i}', email=f'plans-{tag}-{i}@example.com') for i in range(200)
+        ])
+        now = timezone.now()
+
+        products = []
+        for i in range(product_count):
+            category = rng.choice(list(CATEGORIES))
+            discount = rng.choice([10, 20, 30]) if rng.random() < 0.05 else 0
+            flash = discount and rng.random() < 0.5
+            product = Product(
+                seller=self.seller,
+                name=f'Plan product {i}',
+                description='query plan fixture',
+                price=Decimal(rng.randint(100, 50000)) / 100,
+                discount_percentage=discount,
+                flash_sale_start=now + timedelta(hours=rng.randint(-48, 48)) if flash else None,
+                flash_sale_end=now + timedelta(hours=rng.randint(49, 96)) if flash else None,
+                stock_quantity=rng.randint(0, 50),
+                category=category,
+                subcategory=rng.choice(CATEGORIES[category]),
+                brand=f'Brand {rng.randint(1, 200)}',
+                is_featured=rng.random() < 0.02,
+                is_popular=rng.random() < 0.02,
+                display_order=rng.randint(0, 1000),
+            )
+            product.update_pricing(now)
+            products.append(product)
+        Product.objects.bulk_create(products, batch_size=2000)
+        # auto_now_add ignores explicit values on insert; spread the dates afterwards
+        for offset, product in enumerate(products):
+            product.created_at = now - timedelta(minutes=offset)
+        Product.objects.bulk_update(products, ['created_at'], batch_size=2000)
+
+        variants = []
+        for product in products:
+            for size in rng.sample(SIZES, 3):
+                color = rng.choice(COLORS)
+                variants.append(ProductVariant(
+                    product=product, sku=f'{product.pk.hex[:10]}-{size}-{color}-{tag}',
+                    size=size, color=color, stock=rng.randint(0, 10),
+                ))
+        ProductVariant.objects.bulk_create(variants, batch_size=5000, ignore_conflicts=True)
+        # bulk_create skips the signals that keep the search index current
+        search = get_search_backend()
+        for start in range(0, len(products), 1000):
+            search.index_products(products[start:start + 1000])
+
+        reviews = [
+            Review(product=product, user=customer, rating=rng.randint(1, 5), comment='query plan fixture')
+            for product in rng.sample(products, min(len(products), product_count // 10))
+            for customer in rng.sample(self.customers, 5)
+        ]
+        Review.objects.bulk_create(reviews, batch_size=5000)
+
+        statuses = [choice for choice, _ in Order.STATUS_CHOICES]
+        orders = [
+            Order(user=rng.choice(self.customers), customer_name='Plan customer',
+                  total_amount=Decimal(rng.randint(500, 90000)) / 100, status=rng.choice(statuses))
+            for _ in range(order_count)
+        ]
+        Order.objects.bulk_create(orders, batch_size=2000)
+        for offset, order in enumerate(orders):
+            order.created_at = now - timedelta(minutes=offset)
+        Order.objects.bulk_update(orders, ['created_at'], batch_size=2000)
+        self.sample_product = products[len(products) // 2]
+
+    def endpoints(self):
+        product = self.sample_product
+        catalog = '/api/products/?view=card&page_size=24'
+        return [
+            ('default listing', catalog, None),
+            ('category', f'{catalog}&category={product.category}', None),
+            ('subcategory', f'{catalog}&category={product.category}&subcategory={product.subcategory}', None),
+            ('brand', f'{catalog}&brand={product.brand}', None),
+            ('featured', f'{catalog}&is_featured=true', None),
+            ('popular', f'{catalog}&is_popular=true', None),
+            ('on sale', f'{catalog}&on_sale=true', None),
+            ('flash sale', f'{catalog}&flash_sale=true', None),
+            ('price range', f'{catalog}&min_price=100&max_price=101&ordering=effective_price', None),
+            ('newest', f'{catalog}&ordering=-created_at', None),
+            ('top rated', f'{catalog}&ordering=-rating_avg,-rating_count', None),
+            ('seller', f'{catalog}&seller={self.seller.pk}', None),
+            ('variant availability', f'{catalog}&size=M&color=Red&in_stock=true', None),
+            ('variant color', f'{catalog}&color=red', None),
+            ('search', f'/api/products/search/?q={product.name.split()[0]}', None),
+            ('product detail', f'/api/products/{product.pk}/', None),
+            ('review feed', f'/api/reviews/?product={product.pk}&page_size=20', None),
+            ('my orders', '/api/orders/?page_size=24', self.customers[0]),
+            ('all orders (admin)', '/api/orders/?page_size=24', self.seller),
+        ]
+
+    def check_endpoint(self, label, url, user, show_plans):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        # Bypass the response cache so every request reaches the database
+        with override_settings(CACHES=NO_CACHE), CaptureQueriesContext(connection) as captured:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{label}: GET {url} returned {response.status_code}')
+        return self.check_plans(label, captured, show_plans)
+
+    def check_plans(self, label, captured, show_plans):
+        failures = []
+        selects = [query['sql'] for query in captured.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        for sql in selects:
+            plan, scanned = self.explain(sql)
+            for table in scanned:
+                if table in WATCHED_TABLES:
+                    failures.append((label, table, sql))
+            if show_plans:
+                self.stdout.write(f"-- {label}\n{sql}\n{plan}\n")
+        status = self.style.ERROR('SEQ SCAN') if failures else self.style.SUCCESS('ok')
+        self.stdout.write(f"{label:<24} {len(selects)} queries  {status}")
+        return failures
+
+    def explain(self, sql):
+        """Plan text and the tables read by a full sequential scan."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                scanned = []
+                stack = [plan[0]['Plan']]
+                while stack:
+                    node = stack.pop()
+                    if node.get('Node Type') == 'Seq Scan':
+                        scanned.append(node.get('Relation Name'))
+                    stack.extend(node.get('Plans', []))
+                return json.dumps(plan, indent=2), scanned
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            rows = [row[-1] for row in cursor.fetchall()]
+            scanned = []
+            for detail in rows:
+                # "SCAN api_product" is a table scan; "SCAN api_product USING INDEX ..." and
+                # "SEARCH ..." are index reads
+                words = detail.split()
+                if words[:1] == ['SCAN'] and 'USING' not in words:
+                    scanned.append(words[1])
+            return '\n'.join(rows), scanned
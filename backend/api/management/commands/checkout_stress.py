@@ -0,0 +1,114 @@
+import multiprocessing
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Order, OrderItem, Product
+
+User = get_user_model()
+
+
+def _worker(args):
+    """Place `orders` checkouts through OrderViewSet.create; returns outcome counts."""
+    from api.views import OrderViewSet
+
+    user_id, product_ids, orders, max_lines, seed = args
+    connections.close_all()
+    rng = random.Random(seed)
+    user = User.objects.get(pk=user_id)
+    view = OrderViewSet.as_view({'post': 'create'})
+    factory = APIRequestFactory()
+    outcome = {'created': 0, 'rejected': 0, 'errors': 0}
+
+    for _ in range(orders):
+        # Random products in random order, the pattern that deadlocks per-line locking
+        lines = rng.sample(product_ids, rng.randint(1, min(max_lines, len(product_ids))))
+        payload = {
+            'totalPrice': '10.00',
+            'items': [{'id': str(pk), 'quantity': rng.randint(1, 3), 'price': '1.00'} for pk in lines],
+        }
+        request = factory.post('/api/orders/', payload, format='json')
+        force_authenticate(request, user=user)
+        status_code = view(request).status_code
+        if status_code == 201:
+            outcome['created'] += 1
+        elif status_code == 400:
+            outcome['rejected'] += 1
+        else:
+            outcome['errors'] += 1
+
+    connections.close_all()
+    return outcome
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer OrderViewSet.create from several processes against a small set of "
+        "products, verify nothing was oversold and report orders/sec. Use Postgres; "
+        "SQLite serializes writers and reports lock errors instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=50, help='Checkouts per process')
+        parser.add_argument('--products', type=int, default=10)
+        parser.add_argument('--stock', type=int, default=200, help='Initial stock per product')
+        parser.add_argument('--max-lines', type=int, default=4, help='Max cart lines per order')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated user, products and orders')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['products'] < 1:
+            raise CommandError('--processes and --products must be at least 1')
+
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f'stress-{tag}', email=f'stress-{tag}@example.com', password=uuid.uuid4().hex)
+        products = [
+            Product.objects.create(
+                seller=user, name=f'Stress {tag} #{i}', description='checkout stress test',
+                price=1, stock_quantity=options['stock'], category='Stress', brand='Stress',
+            )
+            for i in range(options['products'])
+        ]
+        product_ids = [product.id for product in products]
+
+        jobs = [
+            (user.pk, product_ids, options['orders'], options['max_lines'], seed)
+            for seed in range(options['processes'])
+        ]
+        connections.close_all()
+        started = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+            results = pool.map(_worker, jobs)
+        elapsed = time.perf_counter() - started
+
+        totals = {key: sum(result[key] for result in results) for key in ('created', 'rejected', 'errors')}
+        oversold = []
+        for product in Product.objects.filter(id__in=product_ids):
+            sold = OrderItem.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
+            if product.stock_quantity < 0 or product.stock_quantity + sold != options['stock']:
+                oversold.append((product.name, product.stock_quantity, sold))
+
+        attempts = options['processes'] * options['orders']
+        self.stdout.write(f"Attempts:   {attempts} from {options['processes']} processes")
+        self.stdout.write(f"Created:    {totals['created']}")
+        self.stdout.write(f"Rejected:   {totals['rejected']} (insufficient stock)")
+        self.stdout.write(f"Errors:     {totals['errors']}")
+        self.stdout.write(f"Elapsed:    {elapsed:.2f}s")
+        self.stdout.write(f"Throughput: {totals['created'] / elapsed:.1f} orders/sec, {attempts / elapsed:.1f} attempts/sec")
+
+        if not options['keep']:
+            Order.objects.filter(user=user).delete()
+            Product.objects.filter(id__in=product_ids).delete()
+            user.delete()
+
+        if oversold:
+            for name, stock, sold in oversold:
+                self.stderr.write(f"{name}: stock {stock}, sold {sold}, started with {options['stock']}")
+            raise CommandError('Stock accounting is inconsistent: overselling detected.')
+        self.stdout.write(self.style.SUCCESS('No overselling detected.'))
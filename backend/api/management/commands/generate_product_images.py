@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import cache as response_cache
+from api import jobs
+from api.images import image_sources
+from api.models import Product
+from api.tasks import update_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill thumbnail/medium/large WebP and JPEG renditions for existing product "
+        "images. Queues one job per batch for the worker, or renders here with --sync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--force', action='store_true', help='Re-render images that already have renditions')
+        parser.add_argument('--sync', action='store_true', help='Render in this process instead of queueing jobs')
+
+    def handle(self, *args, **options):
+        products = Product.objects.only('id', 'image', 'additional_images', 'image_renditions', 'updated_at').order_by('pk')
+        last_pk = None
+        queued = rendered = 0
+        while True:
+            batch = products.filter(pk__gt=last_pk) if last_pk else products
+            batch = list(batch[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            todo = []
+            for product in batch:
+                sources = image_sources(product.image.name if product.image else None, product.additional_images, settings.MEDIA_URL)
+                if options['force'] or set(sources) != set(product.image_renditions):
+                    todo.append(product)
+            if not todo:
+                continue
+            if options['sync']:
+                for product in todo:
+                    rendered += update_renditions(product, force=options['force'])
+                self.stdout.write(f"Rendered {rendered} images so far...")
+            else:
+                jobs.enqueue('generate_product_images', {
+                    'product_ids': [str(product.pk) for product in todo],
+                    'force': options['force'],
+                })
+                queued += len(todo)
+
+        if rendered:
+            response_cache.bump(response_cache.PRODUCTS)
+        if options['sync']:
+            self.stdout.write(self.style.SUCCESS(f"Done: {rendered} images rendered."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Queued {queued} products; run `manage.py run_jobs` to process them."))
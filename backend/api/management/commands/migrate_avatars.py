@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.avatars import InvalidAvatar, decode_data_url, save_avatar
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Move legacy base64 profile pictures out of the users table into avatar files, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        pending = User.objects.exclude(Q(profile_picture__isnull=True) | Q(profile_picture=''))
+        converted = failed = 0
+        last_pk = 0
+        while True:
+            # Keyset over pk so each batch only loads `batch_size` blobs into memory
+            batch = list(pending.filter(pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+            if not batch:
+                break
+            for user in batch:
+                last_pk = user.pk
+                try:
+                    save_avatar(user, decode_data_url(user.profile_picture))
+                    converted += 1
+                except InvalidAvatar as e:
+                    failed += 1
+                    self.stderr.write(f"User {user.pk}: {e}")
+            self.stdout.write(f"Converted {converted} avatars so far...")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {converted} converted, {failed} failed."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.facets import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product facet index from scratch (after bulk imports or raw SQL edits)."
+
+    def handle(self, *args, **options):
+        rows = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Facet index rebuilt with {rows} rows."))
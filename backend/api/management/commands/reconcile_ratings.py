@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.ratings import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute product rating averages, counts and histograms from the reviews table."
+
+    def handle(self, *args, **options):
+        fixed = reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Product ratings reconciled ({fixed} products corrected)."))
@@ -0,0 +1,67 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import jobs, pricing
+
+
+def _run_and_close(job_obj):
+    try:
+        return jobs.run(job_obj)
+    finally:
+        # Each pool thread has its own connection; don't leave it open between jobs
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs (bulk imports, image renditions, emails, flash sale boundaries)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=getattr(settings, 'JOBS_CONCURRENCY', 2))
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once no due jobs remain')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        worker = jobs.worker_id()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        self.stdout.write(f"Job worker {worker} started with concurrency {concurrency}")
+        # The flash sale refresh re-queues itself; make sure the chain exists
+        pricing.schedule_next()
+
+        running = set()
+        last_reclaim = 0.0
+        with ThreadPoolExecutor(concurrency) as pool:
+            while not self.stopping:
+                if time.monotonic() - last_reclaim > 60:
+                    reclaimed = jobs.requeue_stale()
+                    if reclaimed:
+                        self.stdout.write(f"Requeued {reclaimed} stale jobs")
+                    last_reclaim = time.monotonic()
+
+                claimed = jobs.claim(worker, limit=concurrency - len(running)) if len(running) < concurrency else []
+                for job_obj in claimed:
+                    running.add(pool.submit(_run_and_close, job_obj))
+
+                if running:
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_obj = future.result()
+                        self.stdout.write(f"{job_obj.name} {job_obj.pk}: {job_obj.status}")
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+
+            # Let in-flight jobs finish before exiting
+            wait(running)
+        self.stdout.write("Job worker stopped")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
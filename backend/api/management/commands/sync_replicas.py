@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.db.routing import PRIMARY, replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over every SQLite replica in DATABASE_REPLICA_URLS. "
+        "Stands in for replication when trying the replica router locally; run it again to "
+        "let replicas catch up. Postgres replicas are kept in sync by the server."
+    )
+
+    def handle(self, *args, **options):
+        if not replicas():
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS.')
+        primary = settings.DATABASES[PRIMARY]
+        for alias in replicas():
+            if connections[PRIMARY].vendor != 'sqlite' or connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias}: only SQLite databases can be copied; use server-side replication.')
+            connections[alias].close()
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(f"{alias} now matches {PRIMARY}."))
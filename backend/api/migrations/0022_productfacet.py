@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Category'), ('subcategory', 'Subcategory'), ('brand', 'Brand'), ('gender', 'Gender'), ('price', 'Price range'), ('on_sale', 'On sale')], max_length=20)),
+                ('parent', models.CharField(blank=True, default='', max_length=100)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'parent', 'value')},
+            },
+        ),
+    ]
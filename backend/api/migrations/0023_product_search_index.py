@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS api_productsearch ("
+            "product_id uuid PRIMARY KEY REFERENCES api_product(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS api_productsearch_document_gin "
+            "ON api_productsearch USING gin (document)"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS api_productsearch USING fts5("
+            "product_id UNINDEXED, name, brand, category, description, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute("DROP TABLE IF EXISTS api_productsearch")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_productfacet'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:37
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Order = apps.get_model('api', 'Order')
+    DailySalesRollup = apps.get_model('api', 'DailySalesRollup')
+    MonthlySalesRollup = apps.get_model('api', 'MonthlySalesRollup')
+
+    daily = []
+    monthly = defaultdict(lambda: [Decimal('0'), 0])
+    rows = (
+        Order.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'status')
+        .annotate(revenue=Sum('total_amount'), order_count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        revenue = row['revenue'] or Decimal('0')
+        daily.append(DailySalesRollup(date=row['day'], status=row['status'], revenue=revenue, order_count=row['order_count']))
+        bucket = monthly[(row['day'].year, row['day'].month, row['status'])]
+        bucket[0] += revenue
+        bucket[1] += row['order_count']
+
+    DailySalesRollup.objects.bulk_create(daily, batch_size=1000)
+    MonthlySalesRollup.objects.bulk_create([
+        MonthlySalesRollup(year=year, month=month, status=status, revenue=revenue, order_count=count)
+        for (year, month, status), (revenue, count) in monthly.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('year', 'month', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('date', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
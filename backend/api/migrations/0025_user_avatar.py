@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/thumbs/'),
+        ),
+    ]
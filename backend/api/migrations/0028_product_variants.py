@@ -0,0 +1,98 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:45
+
+import re
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _sku_part(value):
+    return re.sub(r'[^A-Z0-9]+', '', (value or '').upper())[:12] or 'NA'
+
+
+def copy_variants(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    ProductVariant = apps.get_model('api', 'ProductVariant')
+
+    batch = []
+    for product in Product.objects.only('id', 'variants').iterator(chunk_size=500):
+        seen = set()
+        skus = set()
+        for entry in product.variants or []:
+            if not isinstance(entry, dict):
+                continue
+            size = str(entry.get('size') or '').strip()[:50]
+            color = str(entry.get('color') or '').strip()[:50]
+            if (size, color) in seen:
+                continue
+            seen.add((size, color))
+            try:
+                stock = max(int(entry.get('stock') or 0), 0)
+            except (TypeError, ValueError):
+                stock = 0
+            sku = base = f'{product.pk.hex[:10].upper()}-{_sku_part(size)}-{_sku_part(color)}'
+            suffix = 1
+            while sku in skus:
+                suffix += 1
+                sku = f'{base}-{suffix}'
+            skus.add(sku)
+            batch.append(ProductVariant(product_id=product.pk, sku=sku, size=size, color=color, stock=stock))
+        if len(batch) >= 1000:
+            ProductVariant.objects.bulk_create(batch)
+            batch = []
+    ProductVariant.objects.bulk_create(batch)
+
+
+def restore_variants(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    ProductVariant = apps.get_model('api', 'ProductVariant')
+
+    variants = {}
+    for variant in ProductVariant.objects.order_by('id').iterator(chunk_size=2000):
+        variants.setdefault(variant.product_id, []).append({'size': variant.size, 'color': variant.color, 'stock': variant.stock})
+    for product_id, entries in variants.items():
+        Product.objects.filter(pk=product_id).update(variants=entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_product_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=64, unique=True)),
+                ('size', models.CharField(blank=True, default='', max_length=50)),
+                ('color', models.CharField(blank=True, default='', max_length=50)),
+                ('stock', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_variants', to='api.product')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='variant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.productvariant'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['size', 'color', 'stock'], name='api_variant_size_color_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['color', 'stock'], name='api_variant_color_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productvariant',
+            unique_together={('product', 'size', 'color')},
+        ),
+        migrations.RunPython(copy_variants, restore_variants),
+        migrations.RemoveField(
+            model_name='product',
+            name='variants',
+        ),
+    ]
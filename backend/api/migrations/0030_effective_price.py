@@ -0,0 +1,95 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:54
+
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.utils import timezone
+
+PRICE_BUCKETS = (
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-250', 100, 250),
+    ('250-500', 250, 500),
+    ('500+', 500, None),
+)
+
+
+def fill_prices(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    ProductFacet = apps.get_model('api', 'ProductFacet')
+    now = timezone.now()
+
+    batch = []
+    counts = Counter()
+    fields = ('id', 'price', 'discount_percentage', 'flash_sale_start', 'flash_sale_end')
+    for product in Product.objects.only(*fields).iterator(chunk_size=2000):
+        running = (
+            product.discount_percentage > 0
+            and not (product.flash_sale_start and now < product.flash_sale_start)
+            and not (product.flash_sale_end and now >= product.flash_sale_end)
+        )
+        if running:
+            discount_amount = (product.price * product.discount_percentage) / 100
+            product.sale_price = (product.price - discount_amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        else:
+            product.sale_price = None
+        product.effective_price = product.sale_price if running else product.price
+        batch.append(product)
+        for label, low, high in PRICE_BUCKETS:
+            if product.effective_price >= low and (high is None or product.effective_price < high):
+                counts[('price', label)] += 1
+        counts[('on_sale', 'true' if running else 'false')] += 1
+        if len(batch) >= 1000:
+            Product.objects.bulk_update(batch, ['sale_price', 'effective_price'])
+            batch = []
+    Product.objects.bulk_update(batch, ['sale_price', 'effective_price'])
+
+    # Price and on-sale facets now count the price customers pay
+    ProductFacet.objects.filter(facet__in=('price', 'on_sale')).delete()
+    ProductFacet.objects.bulk_create([
+        ProductFacet(facet=facet, parent='', value=value, count=count)
+        for (facet, value), count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_catalog_and_order_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='api_product_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='api_product_on_sale_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_prices, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='api_product_eff_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('sale_price__isnull', False)), fields=['display_order', '-created_at', 'id'], name='api_product_on_sale_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('flash_sale_start__isnull', False)), fields=['flash_sale_start'], name='api_product_flash_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('flash_sale_end__isnull', False)), fields=['flash_sale_end'], name='api_product_flash_end_idx'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:59
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_ratings(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    Review = apps.get_model('api', 'Review')
+
+    counts = {}
+    for row in Review.objects.order_by().values('product_id', 'rating').annotate(count=Count('id')):
+        if 1 <= row['rating'] <= 5:
+            counts.setdefault(row['product_id'], {})[row['rating']] = row['count']
+    for product_id, stars in counts.items():
+        count = sum(stars.values())
+        total = sum(star * n for star, n in stars.items())
+        Product.objects.filter(pk=product_id).update(
+            rating_count=count,
+            rating_avg=(Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            **{f'rating_{star}': stars.get(star, 0) for star in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating_avg', 'rating_count', 'id'], name='api_product_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-created_at', '-id'], name='api_review_product_feed_idx'),
+        ),
+    ]
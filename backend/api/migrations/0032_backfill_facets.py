@@ -0,0 +1,52 @@
+from collections import Counter
+
+from django.db import migrations
+
+PRICE_BUCKETS = (
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-250', 100, 250),
+    ('250-500', 250, 500),
+    ('500+', 500, None),
+)
+
+
+def fill_facets(apps, schema_editor):
+    # Same counts as api.facets.rebuild_index, so existing catalogs have
+    # categories and brands without a separate rebuild_facets run
+    Product = apps.get_model('api', 'Product')
+    ProductFacet = apps.get_model('api', 'ProductFacet')
+
+    counts = Counter()
+    fields = ('category', 'subcategory', 'brand', 'gender', 'effective_price', 'sale_price')
+    for row in Product.objects.values(*fields).iterator(chunk_size=2000):
+        if row['category']:
+            counts[('category', '', row['category'])] += 1
+            if row['subcategory']:
+                counts[('subcategory', row['category'], row['subcategory'])] += 1
+        if row['brand']:
+            counts[('brand', '', row['brand'])] += 1
+        if row['gender']:
+            counts[('gender', '', row['gender'])] += 1
+        for label, low, high in PRICE_BUCKETS:
+            if row['effective_price'] >= low and (high is None or row['effective_price'] < high):
+                counts[('price', '', label)] += 1
+        counts[('on_sale', '', 'true' if row['sale_price'] is not None else 'false')] += 1
+
+    ProductFacet.objects.all().delete()
+    ProductFacet.objects.bulk_create([
+        ProductFacet(facet=facet, parent=parent, value=value, count=count)
+        for (facet, parent, value), count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_product_ratings'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def fill_search_index(apps, schema_editor):
+    # Index the existing catalog, as rebuild_search_index does, so search
+    # works right after migrate
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "INSERT INTO api_productsearch (product_id, document) "
+            "SELECT id, "
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(brand, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(category, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'D') "
+            "FROM api_product "
+            "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+    elif vendor == 'sqlite':
+        # FTS5 has no upsert; ids are stored the way Django stores UUIDs here
+        schema_editor.execute("DELETE FROM api_productsearch")
+        schema_editor.execute(
+            "INSERT INTO api_productsearch (product_id, name, brand, category, description) "
+            "SELECT id, coalesce(name, ''), coalesce(brand, ''), coalesce(category, ''), coalesce(description, '') "
+            "FROM api_product"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_backfill_facets'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
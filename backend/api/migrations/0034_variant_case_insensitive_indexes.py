@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:34
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_backfill_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productvariant',
+            name='api_variant_size_color_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productvariant',
+            name='api_variant_color_idx',
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(django.db.models.functions.text.Upper('size'), django.db.models.functions.text.Upper('color'), models.F('stock'), name='api_variant_size_color_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(django.db.models.functions.text.Upper('color'), models.F('stock'), name='api_variant_color_idx'),
+        ),
+    ]
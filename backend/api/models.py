@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.utils import timezone
 import datetime
+from decimal import Decimal, ROUND_HALF_UP
 import uuid
 from django.core.validators import MinValueValidator
 
@@ -25,7 +27,9 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
     bio = models.TextField(blank=True, null=True)
     bonus_points = models.IntegerField(default=0)
-    profile_picture = models.TextField(blank=True, null=True) # Storing Base64 string for database persistence
+    profile_picture = models.TextField(blank=True, null=True) # Legacy Base64 avatars, moved to `avatar` by migrate_avatars
+    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    avatar_thumbnail = models.ImageField(upload_to='avatars/thumbs/', blank=True, null=True)
 
     def __str__(self):
         return self.username
@@ -83,17 +87,18 @@ class Product(models.Model):
     brand = models.CharField(max_length=100)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
     additional_images = models.JSONField(default=list, blank=True) # List of image URLs
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False) # Resized copies per source image (see api/images.py)
     gender = models.CharField(max_length=20, choices=[('Male', 'Male'), ('Female', 'Female'), ('Unisex', 'Unisex')], default='Unisex')
     subcategory = models.CharField(max_length=100, blank=True, null=True)
     sizes = models.JSONField(default=list, blank=True) # List of sizes e.g. ["S", "M", "L"]
     colors = models.JSONField(default=list, blank=True) # List of colors e.g. ["Red", "Blue"]
-    variants = models.JSONField(default=list, blank=True) # List of variants e.g. [{size: "M", color: "Red", stock: 5}]
     is_featured = models.BooleanField(default=False)
     is_popular = models.BooleanField(default=False)
     
     # Discount fields
     discount_percentage = models.IntegerField(default=0)
-    sale_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    sale_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True) # Set only while the sale is running
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, editable=False) # What the customer pays: sale_price or price
     
     # Cost of Goods Sold (Internal use only)
     cogs = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, default=0.00)
@@ -104,22 +109,124 @@ class Product(models.Model):
     flash_sale_start = models.DateTimeField(null=True, blank=True)
     flash_sale_end = models.DateTimeField(null=True, blank=True)
     
+    # Review aggregates, maintained by Review signals (see api/ratings.py)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
+    rating_1 = models.IntegerField(default=0, editable=False)
+    rating_2 = models.IntegerField(default=0, editable=False)
+    rating_3 = models.IntegerField(default=0, editable=False)
+    rating_4 = models.IntegerField(default=0, editable=False)
+    rating_5 = models.IntegerField(default=0, editable=False)
+
     display_order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        if self.discount_percentage > 0:
-             # Calculate sale price
-             discount_amount = (self.price * self.discount_percentage) / 100
-             self.sale_price = self.price - discount_amount
+    class Meta:
+        # Access paths of ProductFilter/ProductViewSet; the trailing columns follow the
+        # default listing order (display_order, -created_at, id) so a filtered page is
+        # an index range read instead of a sort. Checked by `manage.py check_query_plans`
+        # and QueryPlanTests.
+        indexes = [
+            models.Index(fields=['display_order', '-created_at', 'id'], name='api_product_listing_idx'),
+            models.Index(fields=['category', 'display_order', '-created_at', 'id'], name='api_product_category_idx'),
+            models.Index(fields=['category', 'subcategory', 'display_order', '-created_at', 'id'], name='api_product_subcategory_idx'),
+            models.Index(fields=['brand', 'display_order', '-created_at', 'id'], name='api_product_brand_idx'),
+            models.Index(fields=['effective_price', 'id'], name='api_product_eff_price_idx'),
+            models.Index(fields=['-created_at', '-id'], name='api_product_created_idx'),
+            models.Index(fields=['rating_avg', 'rating_count', 'id'], name='api_product_rating_idx'),
+            # Partial indexes (PostgreSQL, SQLite): small, and only touched by flagged rows
+            models.Index(fields=['display_order', '-created_at', 'id'], condition=models.Q(is_featured=True), name='api_product_featured_idx'),
+            models.Index(fields=['display_order', '-created_at', 'id'], condition=models.Q(is_popular=True), name='api_product_popular_idx'),
+            models.Index(fields=['display_order', '-created_at', 'id'], condition=models.Q(sale_price__isnull=False), name='api_product_on_sale_idx'),
+            # Flash sale boundaries, read by the scheduler in api/pricing.py
+            models.Index(fields=['flash_sale_start'], condition=models.Q(flash_sale_start__isnull=False), name='api_product_flash_start_idx'),
+            models.Index(fields=['flash_sale_end'], condition=models.Q(flash_sale_end__isnull=False), name='api_product_flash_end_idx'),
+        ]
+
+    # Fields sale_price/effective_price are derived from
+    PRICING_FIELDS = ('price', 'discount_percentage', 'flash_sale_start', 'flash_sale_end')
+
+    def sale_running(self, now=None):
+        """A discount runs indefinitely, or only inside [flash_sale_start, flash_sale_end) when set."""
+        if not self.discount_percentage or self.discount_percentage <= 0:
+            return False
+        now = now or timezone.now()
+        if self.flash_sale_start and now < self.flash_sale_start:
+            return False
+        if self.flash_sale_end and now >= self.flash_sale_end:
+            return False
+        return True
+
+    def update_pricing(self, now=None):
+        price = Decimal(str(self.price))
+        if self.sale_running(now):
+            discount_amount = (price * self.discount_percentage) / 100
+            self.sale_price = (price - discount_amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
         else:
-             self.sale_price = None
+            self.sale_price = None
+        self.effective_price = self.sale_price if self.sale_price is not None else price
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Partial saves of unrelated columns keep the stored prices; the flash sale
+        # scheduler, not arbitrary writes, moves products across window boundaries
+        if update_fields is None or set(update_fields) & set(self.PRICING_FIELDS):
+            self.update_pricing()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'sale_price', 'effective_price'}
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+class ProductVariant(models.Model):
+    # One row per size/color combination; Product.stock_quantity stays the total
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='product_variants')
+    sku = models.CharField(max_length=64, unique=True)
+    size = models.CharField(max_length=50, blank=True, default='')
+    color = models.CharField(max_length=50, blank=True, default='')
+    stock = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+
+    class Meta:
+        unique_together = ('product', 'size', 'color')
+        indexes = [
+            # ?size=&color=&in_stock= filters resolve to these instead of scanning products;
+            # they match case-insensitively, so the indexes are on UPPER(size/color)
+            models.Index(Upper('size'), Upper('color'), 'stock', name='api_variant_size_color_idx'),
+            models.Index(Upper('color'), 'stock', name='api_variant_color_idx'),
+        ]
+
+    def __str__(self):
+        return self.sku
+
+class ProductFacet(models.Model):
+    # Maintained counts behind /products/facets/ and /categories/ (see api/facets.py)
+    CATEGORY = 'category'
+    SUBCATEGORY = 'subcategory'
+    BRAND = 'brand'
+    GENDER = 'gender'
+    PRICE = 'price'
+    ON_SALE = 'on_sale'
+    FACET_CHOICES = (
+        (CATEGORY, 'Category'),
+        (SUBCATEGORY, 'Subcategory'),
+        (BRAND, 'Brand'),
+        (GENDER, 'Gender'),
+        (PRICE, 'Price range'),
+        (ON_SALE, 'On sale'),
+    )
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    parent = models.CharField(max_length=100, blank=True, default='') # Category for subcategory rows
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('facet', 'parent', 'value')
+
+    def __str__(self):
+        return f"{self.facet}:{self.value} ({self.count})"
+
 class Wishlist(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='wishlist')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='wishlisted_by')
@@ -145,12 +252,21 @@ class Order(models.Model):
     # Add shipping address snapshot to Order (optional but good practice)
     # For now, simplistic approach as requested.
 
+    class Meta:
+        indexes = [
+            # "My orders" newest first, admin lists and status queues by date
+            models.Index(fields=['user', '-created_at', '-id'], name='api_order_user_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='api_order_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='api_order_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+    variant = models.ForeignKey(ProductVariant, on_delete=models.SET_NULL, null=True, blank=True)
     quantity = models.IntegerField(default=1)
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
 
@@ -159,6 +275,26 @@ class OrderItem(models.Model):
             return f"{self.quantity} x {self.product.name}"
         return f"{self.quantity} x Unknown Product"
 
+class DailySalesRollup(models.Model):
+    # Pre-aggregated order totals, maintained by api/rollups.py
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'status')
+
+class MonthlySalesRollup(models.Model):
+    year = models.IntegerField()
+    month = models.IntegerField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('year', 'month', 'status')
+
 class Payment(models.Model):
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='payment')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -178,6 +314,10 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('product', 'user') # One review per product per user
+        indexes = [
+            # Per-product review feed, paged by (created_at, id) keyset
+            models.Index(fields=['product', '-created_at', '-id'], name='api_review_product_feed_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.username} on {self.product.name}"
@@ -193,3 +333,35 @@ class ContactMessage(models.Model):
 
     def __str__(self):
         return f"Message from {self.name} - {self.subject or 'No Subject'}"
+
+
+class Job(models.Model):
+    # Background work queue processed by `manage.py run_jobs` (see api/jobs.py)
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='api_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,212 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination.
+
+    Lists stay plain arrays unless the client sends `cursor` or `page_size`,
+    so existing callers keep working. When enabled, rows are paged with a
+    `WHERE (a, b, id) > (...)` style filter on a stable ordering instead of
+    OFFSET, so every page costs the same regardless of depth.
+
+    Views choose the ordering with `cursor_ordering`. A client supplied
+    `?ordering=` (OrderingFilter) takes precedence as long as it only uses
+    non-nullable fields; the primary key is always appended as a tiebreaker.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 24
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_enabled(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_enabled(request):
+            return None
+        page_queryset, values, reverse = self.page_queryset(queryset, request, view)
+        return self.finish_page(list(page_queryset), values, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views; the page is read with the async ORM."""
+        if not self.is_enabled(request):
+            return None
+        page_queryset, values, reverse = self.page_queryset(queryset, request, view)
+        return self.finish_page([row async for row in page_queryset], values, reverse)
+
+    def page_queryset(self, queryset, request, view):
+        """The unevaluated query for the requested page, plus the decoded cursor."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+
+        values, reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+
+        # Fetch one extra row to know whether another page follows
+        return queryset[:self.page_size + 1], values, reverse
+
+    def finish_page(self, results, values, reverse):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str) and self._is_keyset_field(queryset.model, field)
+        ]
+        if not ordering or len(ordering) != len(queryset.query.order_by):
+            ordering = list(getattr(view, 'cursor_ordering', None) or ('-' + pk_name,))
+
+        if not any(field.lstrip('-') in (pk_name, 'pk') for field in ordering):
+            direction = '-' if ordering[-1].startswith('-') else ''
+            ordering.append(direction + pk_name)
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors come from the client: every value must parse as its ordering field
+        try:
+            values = [self._model_field(model, field).to_python(value) for field, value in zip(self.ordering, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        payload = {'v': values}
+        if reverse:
+            payload['r'] = 1
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    def _link(self, obj, reverse):
+        # Rows may be model instances or dicts from a values() queryset
+        get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+        values = [self._json_value(get(self._attname(field))) for field in self.ordering]
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def _after(self, ordering, values):
+        # Lexicographic "row comes after" filter:
+        # (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _attname(self, field):
+        name = field.lstrip('-')
+        return 'id' if name == 'pk' else name
+
+    @staticmethod
+    def _model_field(model, field):
+        name = field.lstrip('-')
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _is_keyset_field(model, field):
+        name = field.lstrip('-')
+        if name == 'pk':
+            return True
+        try:
+            model_field = model._meta.get_field(name)
+        except Exception:
+            return False
+        return model_field.concrete and not model_field.null and not model_field.is_relation
+
+    @staticmethod
+    def _json_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, (Decimal, UUID)):
+            return str(value)
+        return value
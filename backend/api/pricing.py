@@ -0,0 +1,99 @@
+"""
+Stored sale pricing and the flash sale scheduler.
+
+`Product.sale_price` is set only while a discount is running and
+`effective_price` is what the customer pays, so price range filters,
+`on_sale` and price ordering are index reads instead of per-row math.
+`Product.save()` prices a product for the current moment.
+
+A discount with a flash window runs inside [flash_sale_start,
+flash_sale_end). Nothing writes to a product when the clock crosses one
+of those boundaries, so the `refresh_flash_sales` job does: it reprices
+products whose stored state disagrees with the clock and queues itself
+again for the next boundary (at most MAX_SLEEP seconds away).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache as response_cache
+from . import facets, jobs
+from .autocomplete import autocomplete
+from .models import Job, Product
+
+JOB_NAME = 'refresh_flash_sales'
+# Recheck at least this often, for windows written by bulk updates or raw SQL
+MAX_SLEEP = getattr(settings, 'FLASH_SALE_MAX_SLEEP', 3600)
+
+
+def due(now):
+    """Products whose stored sale state is wrong at `now`."""
+    starting = (
+        Q(sale_price__isnull=True, discount_percentage__gt=0, flash_sale_start__lte=now)
+        & (Q(flash_sale_end__isnull=True) | Q(flash_sale_end__gt=now))
+    )
+    ending = Q(sale_price__isnull=False) & (Q(flash_sale_end__lte=now) | Q(flash_sale_start__gt=now))
+    return starting | ending
+
+
+def refresh_sales(now=None):
+    """Reprice products that crossed a flash sale boundary; returns how many changed."""
+    now = now or timezone.now()
+    columns = set(facets.FACET_SOURCE_FIELDS) | set(Product.PRICING_FIELDS) | {'id', 'sale_price', 'effective_price'}
+    with transaction.atomic():
+        products = Product.objects.select_for_update().filter(due(now)).only(*columns)
+        removed, added, changed = [], [], []
+        for product in products:
+            before = facets.facet_entries(product)
+            stored = (product.sale_price, product.effective_price)
+            product.update_pricing(now)
+            if (product.sale_price, product.effective_price) != stored:
+                removed.extend(before)
+                added.extend(facets.facet_entries(product))
+                changed.append(product)
+        if not changed:
+            return 0
+
+        # bulk_update skips Product signals; keep the facet index and caches in step here
+        Product.objects.bulk_update(changed, ['sale_price', 'effective_price'], batch_size=1000)
+        facets.apply_delta(removed, added)
+        transaction.on_commit(lambda: response_cache.bump(response_cache.PRODUCTS))
+        transaction.on_commit(autocomplete.invalidate)
+    return len(changed)
+
+
+def next_boundary(now=None):
+    """The next flash sale start or end after `now`, or None."""
+    now = now or timezone.now()
+    discounted = Product.objects.filter(discount_percentage__gt=0)
+    # Two LIMIT 1 range reads on the boundary indexes
+    upcoming = [
+        discounted.filter(**{f'{field}__gt': now}).order_by(field).values_list(field, flat=True).first()
+        for field in ('flash_sale_start', 'flash_sale_end')
+    ]
+    upcoming = [moment for moment in upcoming if moment is not None]
+    return min(upcoming) if upcoming else None
+
+
+def schedule(at):
+    """Make sure a refresh job is queued to run no later than `at`."""
+    at = max(at, timezone.now())
+    queued = Job.objects.filter(name=JOB_NAME, status='queued')
+    if queued.filter(run_at__lte=at).exists():
+        return
+    if not queued.update(run_at=at):
+        jobs.enqueue(JOB_NAME, delay=(at - timezone.now()).total_seconds())
+
+
+def schedule_next(now=None):
+    """Queue the refresh for the next boundary (or the MAX_SLEEP recheck); returns its time."""
+    now = now or timezone.now()
+    at = now + timedelta(seconds=MAX_SLEEP)
+    boundary = next_boundary(now)
+    if boundary is not None and boundary < at:
+        at = boundary
+    schedule(at)
+    return at
@@ -0,0 +1,64 @@
+"""
+Per-view query budgets.
+
+Views set `query_budget` to an int or to {action: int}. When
+settings.QUERY_BUDGET_MODE is 'warn' the request is logged if it runs more
+queries than budgeted; 'raise' turns it into an error so tests fail on an
+N+1 regression (api/tests.py runs the list endpoints in this mode at
+several result sizes); 'off' skips counting entirely.
+Budgets are meant to be constant: they must not grow with the number of
+rows in the response.
+"""
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    query_budget = None
+
+    def get_query_budget(self):
+        budget = self.query_budget
+        if isinstance(budget, dict):
+            action_map = getattr(self, 'action_map', None) or {}
+            return budget.get(action_map.get(self.request.method.lower()))
+        return budget
+
+    def dispatch(self, request, *args, **kwargs):
+        mode = getattr(settings, 'QUERY_BUDGET_MODE', 'off')
+        self.request = request
+        budget = self.get_query_budget() if mode != 'off' else None
+        if budget is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            # Reads may be served by a replica (core/db/routing.py)
+            for alias_connection in connections.all():
+                stack.enter_context(alias_connection.execute_wrapper(counter))
+            response = super().dispatch(request, *args, **kwargs)
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(counter.count)
+        if counter.count > budget:
+            message = f"{type(self).__name__} {request.method} {request.path} ran {counter.count} queries (budget {budget})"
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,80 @@
+"""
+Sparse `display_order` ranks for merchandising.
+
+Ranks are spaced RANK_GAP apart, so a product moved between two others
+takes a rank inside the gap and nothing else is rewritten. Given the new
+order of a list, `plan_ranks` keeps the longest run of products whose
+current ranks are already in order and only re-ranks the rest: one
+drag-and-drop move is one row update whatever the catalog size. When a
+gap is exhausted the whole list is respaced once.
+"""
+from bisect import bisect_left
+
+RANK_GAP = 1024
+# Stay well inside a 32-bit IntegerField
+RANK_LIMIT = 2 ** 30
+
+
+def _increasing_run(ranks):
+    """Indexes of a longest strictly increasing subsequence of `ranks`."""
+    tails = []       # smallest tail rank of an increasing run of each length
+    tail_index = []  # position in `ranks` of that tail
+    previous = [-1] * len(ranks)
+    for i, rank in enumerate(ranks):
+        length = bisect_left(tails, rank)
+        if length == len(tails):
+            tails.append(rank)
+            tail_index.append(i)
+        else:
+            tails[length] = rank
+            tail_index[length] = i
+        previous[i] = tail_index[length - 1] if length else -1
+
+    kept = []
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        kept.append(i)
+        i = previous[i]
+    return set(kept)
+
+
+def spaced(count):
+    return [RANK_GAP * (i + 1) for i in range(count)]
+
+
+def plan_ranks(ranks):
+    """
+    New ranks for a list whose items currently have `ranks` (in the new
+    display order). Items in the kept increasing run keep their rank.
+    """
+    kept = _increasing_run(ranks)
+    planned = list(ranks)
+    i = 0
+    while i < len(ranks):
+        if i in kept:
+            i += 1
+            continue
+        # Re-rank the run of moved items [i, j) between its kept neighbours
+        j = i
+        while j < len(ranks) and j not in kept:
+            j += 1
+        count = j - i
+        low = planned[i - 1] if i > 0 else None
+        high = ranks[j] if j < len(ranks) else None
+        if low is None and high is None:
+            values = spaced(count)
+        elif low is None:
+            values = [high - RANK_GAP * (count - k) for k in range(count)]
+        elif high is None:
+            values = [low + RANK_GAP * (k + 1) for k in range(count)]
+        else:
+            step = (high - low) // (count + 1)
+            if step < 1:
+                return spaced(len(ranks))
+            values = [low + step * (k + 1) for k in range(count)]
+        planned[i:j] = values
+        i = j
+
+    if planned and (planned[0] < -RANK_LIMIT or planned[-1] > RANK_LIMIT):
+        return spaced(len(ranks))
+    return planned
@@ -0,0 +1,80 @@
+"""
+Review aggregates stored on Product.
+
+Each product keeps a rating histogram (`rating_1` .. `rating_5`) plus
+`rating_count` and `rating_avg` derived from it, so product cards,
+`?min_rating=` and `?ordering=-rating_avg` never touch the reviews table.
+Review signals move one review's contribution inside the review's own
+transaction, holding the product row lock so concurrent reviews cannot
+lose updates. `manage.py reconcile_ratings` recomputes every product from
+the reviews table.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count
+
+from . import cache as response_cache
+from .models import Product, Review
+
+STARS = range(1, 6)
+HISTOGRAM_FIELDS = tuple(f'rating_{star}' for star in STARS)
+RATING_FIELDS = HISTOGRAM_FIELDS + ('rating_count', 'rating_avg')
+
+
+def summarize(counts):
+    """All rating columns for histogram `counts` ({'rating_1': n, ...})."""
+    count = sum(counts[field] for field in HISTOGRAM_FIELDS)
+    total = sum(star * counts[f'rating_{star}'] for star in STARS)
+    average = (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if count else Decimal('0')
+    return {**{field: counts[field] for field in HISTOGRAM_FIELDS}, 'rating_count': count, 'rating_avg': average}
+
+
+def histogram(product):
+    """{'1': n, ..., '5': n} for the API."""
+    get = product.get if isinstance(product, dict) else lambda name: getattr(product, name)
+    return {str(star): get(f'rating_{star}') for star in STARS}
+
+
+def apply(contributions):
+    """Apply [(product_id, rating, sign)] to the stored aggregates."""
+    deltas = {}
+    for product_id, rating, sign in contributions:
+        if product_id is None or rating not in STARS:
+            continue
+        field = f'rating_{rating}'
+        deltas.setdefault(product_id, {})
+        deltas[product_id][field] = deltas[product_id].get(field, 0) + sign
+
+    with transaction.atomic():
+        # Lock in primary key order, like checkout, so concurrent writers queue up
+        for product_id in sorted(deltas, key=str):
+            row = Product.objects.select_for_update().filter(pk=product_id).values(*HISTOGRAM_FIELDS).first()
+            if row is None:
+                continue
+            for field, delta in deltas[product_id].items():
+                row[field] = max(row[field] + delta, 0)
+            Product.objects.filter(pk=product_id).update(**summarize(row))
+
+
+def reconcile():
+    """Recompute every product's aggregates from the reviews table; returns how many were wrong."""
+    counted = {}
+    for row in Review.objects.order_by().values('product_id', 'rating').annotate(count=Count('id')):
+        if row['rating'] in STARS:
+            counted.setdefault(row['product_id'], dict.fromkeys(HISTOGRAM_FIELDS, 0))[f"rating_{row['rating']}"] = row['count']
+
+    empty = dict.fromkeys(HISTOGRAM_FIELDS, 0)
+    changed = []
+    for product in Product.objects.only('id', *RATING_FIELDS).iterator(chunk_size=2000):
+        expected = summarize(counted.get(product.pk, empty))
+        if any(getattr(product, field) != value for field, value in expected.items()):
+            for field, value in expected.items():
+                setattr(product, field, value)
+            changed.append(product)
+
+    # bulk_update sends no signals; rating columns don't feed the facet or search indexes
+    Product.objects.bulk_update(changed, list(RATING_FIELDS), batch_size=1000)
+    if changed:
+        response_cache.bump(response_cache.PRODUCTS)
+    return len(changed)
@@ -0,0 +1,107 @@
+"""
+Daily and monthly sales rollups behind the admin dashboard.
+
+Every order contributes (total_amount, 1) to the rollup rows for its
+creation day/month and current status. Order signals move that
+contribution when an order is created, changes status or amount, or is
+deleted; the update runs inside the same transaction as the order write.
+`backfill_sales_rollups` rebuilds the tables from the orders table.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySalesRollup, MonthlySalesRollup, Order
+
+ROLLUP_SOURCE_FIELDS = ('status', 'total_amount', 'created_at')
+
+
+def rollup_key(created_at, status):
+    day = timezone.localtime(created_at).date() if timezone.is_aware(created_at) else created_at.date()
+    return day, status
+
+
+DAILY_KEY = ('date', 'status')
+MONTHLY_KEY = ('year', 'month', 'status')
+
+
+def _add(model, fields, changes):
+    """Add {key: [revenue, count]} to the `model` rows keyed by `fields`."""
+    changes = {key: change for key, change in changes.items() if any(change)}
+    # Rows a contribution adds to may not exist yet. ON CONFLICT DO NOTHING, so
+    # two first orders of a day or month don't collide on the unique key.
+    model.objects.bulk_create([
+        model(**dict(zip(fields, key))) for key in sorted(changes) if changes[key][1] > 0
+    ], ignore_conflicts=True)
+    # Sorted, so concurrent checkouts and status changes lock rows in the same order
+    for key in sorted(changes):
+        revenue, count = changes[key]
+        model.objects.filter(**dict(zip(fields, key))).update(
+            revenue=F('revenue') + revenue, order_count=F('order_count') + count,
+        )
+
+
+def apply(contributions):
+    """Apply [(created_at, status, amount, sign)] to both rollup tables."""
+    daily = defaultdict(lambda: [Decimal('0'), 0])
+    monthly = defaultdict(lambda: [Decimal('0'), 0])
+    for created_at, status, amount, sign in contributions:
+        if created_at is None or amount is None:
+            continue
+        day, status = rollup_key(created_at, status)
+        revenue = Decimal(str(amount)) * sign
+        for changes, key in ((daily, (day, status)), (monthly, (day.year, day.month, status))):
+            changes[key][0] += revenue
+            changes[key][1] += sign
+
+    with transaction.atomic():
+        _add(DailySalesRollup, DAILY_KEY, daily)
+        _add(MonthlySalesRollup, MONTHLY_KEY, monthly)
+
+
+def backfill():
+    """Recompute both tables from the orders table; returns the number of daily rows."""
+    daily = (
+        Order.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'status')
+        .annotate(revenue=Sum('total_amount'), order_count=Count('id'))
+        .order_by()
+    )
+    daily_rows = []
+    monthly = defaultdict(lambda: [Decimal('0'), 0])
+    for row in daily:
+        revenue = row['revenue'] or Decimal('0')
+        daily_rows.append(DailySalesRollup(date=row['day'], status=row['status'], revenue=revenue, order_count=row['order_count']))
+        bucket = monthly[(row['day'].year, row['day'].month, row['status'])]
+        bucket[0] += revenue
+        bucket[1] += row['order_count']
+
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        MonthlySalesRollup.objects.all().delete()
+        DailySalesRollup.objects.bulk_create(daily_rows, batch_size=1000)
+        MonthlySalesRollup.objects.bulk_create([
+            MonthlySalesRollup(year=year, month=month, status=status, revenue=revenue, order_count=count)
+            for (year, month, status), (revenue, count) in monthly.items()
+        ], batch_size=1000)
+    return len(daily_rows)
+
+
+def totals():
+    """All-time revenue and order count, from the monthly table."""
+    result = MonthlySalesRollup.objects.aggregate(revenue=Sum('revenue'), orders=Sum('order_count'))
+    return result['revenue'] or Decimal('0'), result['orders'] or 0
+
+
+def monthly_trend(year):
+    """Revenue per month (Jan..Dec) for `year`, across all statuses."""
+    trend = [0.0] * 12
+    rows = MonthlySalesRollup.objects.filter(year=year).values('month').annotate(revenue=Sum('revenue')).order_by()
+    for row in rows:
+        if 1 <= row['month'] <= 12:
+            trend[row['month'] - 1] = float(row['revenue'] or 0)
+    return trend
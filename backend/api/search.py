@@ -0,0 +1,238 @@
+"""
+Product search backends.
+
+`get_search_backend()` picks an indexed implementation for the configured
+database (Postgres tsvector + GIN, SQLite FTS5) and falls back to plain
+`icontains` matching elsewhere. Backends return product ids ordered by
+relevance; the view loads and serializes the rows.
+
+Relevance weights follow the merchandising priority name > brand >
+category > description. The index table itself is created by migration
+0023 and kept current from Product signals (see api/signals.py).
+"""
+import re
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Product
+
+SEARCH_FIELDS = ('name', 'brand', 'category', 'description')
+SEARCH_TABLE = 'api_productsearch'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query.lower())[:10]
+
+
+class BaseSearchBackend:
+    def search(self, query, limit=20):
+        raise NotImplementedError
+
+    def index_products(self, products):
+        pass
+
+    def remove_products(self, product_ids):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        """Reindex every product in batches; returns the number indexed."""
+        self.clear()
+        total = 0
+        batch = []
+        for product in Product.objects.only('id', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+            batch.append(product)
+            if len(batch) >= batch_size:
+                self.index_products(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.index_products(batch)
+            total += len(batch)
+        return total
+
+    def clear(self):
+        pass
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Unindexed fallback: icontains on every field with a weighted CASE rank."""
+
+    def search(self, query, limit=20):
+        query = query.strip()
+        if not query:
+            return []
+        rank = Case(
+            When(name__icontains=query, then=Value(8)),
+            When(brand__icontains=query, then=Value(4)),
+            When(category__icontains=query, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+        match = Q()
+        for field in SEARCH_FIELDS:
+            match |= Q(**{f'{field}__icontains': query})
+        return list(
+            Product.objects.filter(match).annotate(rank=rank)
+            .order_by('-rank', '-created_at').values_list('id', flat=True)[:limit]
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector document per product with a GIN index, ranked by ts_rank."""
+
+    DOCUMENT_SQL = (
+        "setweight(to_tsvector('english', coalesce(%s, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(%s, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(%s, '')), 'C') || "
+        "setweight(to_tsvector('english', coalesce(%s, '')), 'D')"
+    )
+
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Prefix match on every term so results update while typing
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {SEARCH_TABLE} "
+                "WHERE document @@ to_tsquery('english', %s) "
+                "ORDER BY ts_rank(document, to_tsquery('english', %s)) DESC LIMIT %s",
+                [tsquery, tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_products(self, products):
+        if not products:
+            return
+        values_sql = ', '.join([f"(%s, {self.DOCUMENT_SQL})"] * len(products))
+        params = []
+        for product in products:
+            params.append(product.pk)
+            params.extend(getattr(product, field) for field in SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (product_id, document) VALUES {values_sql} "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                params,
+            )
+
+    def remove_products(self, product_ids):
+        if not product_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE product_id = ANY(%s)", [list(product_ids)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 virtual table, ranked by bm25 with per-column weights."""
+
+    # bm25 weights in column order: product_id (unindexed), name, brand, category, description
+    BM25_WEIGHTS = '0.0, 10.0, 5.0, 2.0, 1.0'
+
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"ORDER BY bm25({SEARCH_TABLE}, {self.BM25_WEIGHTS}) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_products(self, products):
+        if not products:
+            return
+        # FTS5 has no upsert; replace rows explicitly
+        self.remove_products([product.pk for product in products])
+        rows = [
+            [self._key(product.pk)] + [getattr(product, field) or '' for field in SEARCH_FIELDS]
+            for product in products
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (product_id, name, brand, category, description) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove_products(self, product_ids):
+        keys = [self._key(pk) for pk in product_ids]
+        if not keys:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE product_id IN ({', '.join(['%s'] * len(keys))})",
+                keys,
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    @staticmethod
+    def _key(pk):
+        # Match how Django stores UUIDs on SQLite (32 hex chars, no dashes)
+        return pk.hex if hasattr(pk, 'hex') else str(pk).replace('-', '')
+
+
+BACKENDS = {
+    'simple': SimpleSearchBackend,
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend():
+    """
+    Resolve settings.SEARCH_BACKEND ('auto', 'simple', 'postgresql' or
+    'sqlite'). 'auto' uses the indexed backend for the default database.
+    """
+    name = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = connection.vendor if connection.vendor in BACKENDS else 'simple'
+    return BACKENDS[name]()
+
+
+def _search_ids(query, limit):
+    return [pk if isinstance(pk, uuid.UUID) else uuid.UUID(str(pk)) for pk in get_search_backend().search(query, limit=limit)]
+
+
+def search_products(query, limit=20):
+    """Return Product rows for `query`, most relevant first."""
+    ids = _search_ids(query, limit)
+    products = Product.objects.in_bulk(ids)
+    return [products[pk] for pk in ids if pk in products]
+
+
+async def asearch_products(query, limit=20, queryset=None):
+    """
+    search_products for async views. The backends run raw SQL, so the id
+    lookup runs in a thread; the rows (from `queryset`) load through the
+    async ORM.
+    """
+    ids = await sync_to_async(_search_ids)(query, limit)
+    products = await (queryset if queryset is not None else Product.objects.all()).ain_bulk(ids)
+    return [products[pk] for pk in ids if pk in products]
+
+
+def reindex_products(products):
+    backend = get_search_backend()
+    transaction.on_commit(lambda: backend.index_products(products))
+
+
+def unindex_products(product_ids):
+    backend = get_search_backend()
+    transaction.on_commit(lambda: backend.remove_products(product_ids))
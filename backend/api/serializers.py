@@ -1,6 +1,17 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Product, Order, OrderItem, Payment, PageContent, Affiliate, Review, Wishlist, ContactMessage, Address
+from .avatars import InvalidAvatar, decode_data_url, save_avatar
+from .images import srcset, storage_name
+from .ratings import HISTOGRAM_FIELDS, histogram as rating_histogram
+from .variants import normalize as normalize_variants, sync_variants
+from .models import Product, ProductVariant, Order, OrderItem, Payment, PageContent, Affiliate, Review, Wishlist, ContactMessage, Address, Job
 
 User = get_user_model()
 
@@ -12,11 +23,39 @@ class AddressSerializer(serializers.ModelSerializer):
 
 class UserSerializer(serializers.ModelSerializer):
     addresses = AddressSerializer(many=True, read_only=True)
-    
+    # URLs of the stored avatar files; legacy clients may still write a base64 data URL
+    profile_picture = serializers.SerializerMethodField()
+    profile_picture_thumbnail = serializers.SerializerMethodField()
+    avatar = serializers.ImageField(write_only=True, required=False)
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'role', 'bio', 'bonus_points', 'profile_picture', 'date_joined', 'last_login', 'addresses')
-        read_only_fields = ('id', 'date_joined', 'bonus_points', 'last_login')
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'role', 'bio', 'bonus_points', 'profile_picture', 'profile_picture_thumbnail', 'avatar', 'date_joined', 'last_login', 'addresses')
+        read_only_fields = ('id', 'role', 'date_joined', 'bonus_points', 'last_login')
+
+    def _file_url(self, field):
+        if not field:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(field.url) if request is not None else field.url
+
+    def get_profile_picture(self, obj):
+        return self._file_url(obj.avatar)
+
+    def get_profile_picture_thumbnail(self, obj):
+        return self._file_url(obj.avatar_thumbnail)
+
+    def update(self, instance, validated_data):
+        upload = validated_data.pop('avatar', None)
+        legacy = self.initial_data.get('profile_picture') if hasattr(self, 'initial_data') else None
+        try:
+            if upload is None and isinstance(legacy, str) and legacy.startswith('data:'):
+                upload = decode_data_url(legacy)
+            if upload is not None:
+                save_avatar(instance, upload, save=False)
+        except InvalidAvatar as e:
+            raise serializers.ValidationError({'avatar': str(e)})
+        return super().update(instance, validated_data)
 
 class PageContentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -31,28 +70,192 @@ class AffiliateSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('user', 'earnings', 'clicks', 'created_at')
 
-class ProductSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """Accepts an optional `fields` argument limiting which fields are output."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+# Fields a product grid tile needs (?view=card)
+PRODUCT_CARD_FIELDS = (
+    'id', 'name', 'price', 'sale_price', 'effective_price', 'discount_percentage', 'category', 'subcategory', 'brand',
+    'image', 'image_url', 'image_srcset', 'stock_quantity', 'gender', 'sizes', 'colors', 'is_featured', 'is_popular',
+    'seller', 'created_at', 'flash_sale_start', 'flash_sale_end', 'rating_avg', 'rating_count',
+)
+
+def _media_url_builder(request):
+    def build(name):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return build
+
+def image_srcsets(image, additional_images, renditions, request=None):
+    """srcset entries for the main image and each additional image (None until rendered)."""
+    renditions = renditions or {}
+    build_url = _media_url_builder(request)
+    main = srcset(renditions.get(image), build_url) if image else None
+    additional = [
+        srcset(renditions.get(storage_name(url, settings.MEDIA_URL)), build_url)
+        for url in additional_images or []
+    ]
+    return main, additional
+
+class VariantListField(serializers.JSONField):
+    """`variants` as a [{sku, size, color, stock}] list, stored as ProductVariant rows."""
+
+    def to_representation(self, value):
+        return [
+            {'sku': variant.sku, 'size': variant.size, 'color': variant.color, 'stock': variant.stock}
+            for variant in value.all()
+        ]
+
+    def to_internal_value(self, data):
+        data = super().to_internal_value(data)
+        try:
+            return normalize_variants(data)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     image_url = serializers.ImageField(source='image', read_only=True)
+    image_srcset = serializers.SerializerMethodField()
+    additional_images_srcset = serializers.SerializerMethodField()
+    variants = VariantListField(source='product_variants', required=False)
+    rating_histogram = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'price', 'category', 'subcategory', 'brand',
-            'image', 'image_url', 'additional_images', 'stock_quantity', 'gender', 'sizes', 'colors',
+            'image', 'image_url', 'image_srcset', 'additional_images', 'additional_images_srcset',
+            'stock_quantity', 'gender', 'sizes', 'colors',
             'is_featured', 'is_popular', 'variants', 'seller', 'created_at',
-            'discount_percentage', 'sale_price',
+            'discount_percentage', 'sale_price', 'effective_price',
             'cogs', 'marketing_cost', 'shipping_cost',
-            'flash_sale_start', 'flash_sale_end'
+            'flash_sale_start', 'flash_sale_end',
+            'rating_avg', 'rating_count', 'rating_histogram',
         ]
-        read_only_fields = ('seller', 'created_at', 'sale_price')
+        read_only_fields = ('seller', 'created_at', 'sale_price', 'effective_price')
+
+    def create(self, validated_data):
+        variants = validated_data.pop('product_variants', None)
+        with transaction.atomic():
+            product = super().create(validated_data)
+            if variants is not None:
+                sync_variants(product, variants)
+        return product
+
+    def update(self, instance, validated_data):
+        variants = validated_data.pop('product_variants', None)
+        with transaction.atomic():
+            product = super().update(instance, validated_data)
+            if variants is not None:
+                sync_variants(product, variants)
+        return product
+
+    def _srcsets(self, obj):
+        return image_srcsets(obj.image.name if obj.image else None, obj.additional_images,
+                             obj.image_renditions, self.context.get('request'))
+
+    def get_image_srcset(self, obj):
+        return self._srcsets(obj)[0]
+
+    def get_additional_images_srcset(self, obj):
+        return self._srcsets(obj)[1]
+
+    def get_rating_histogram(self, obj):
+        return rating_histogram(obj)
+
+class ProductRowSerializer:
+    """
+    Read-only fast path for product list responses.
+
+    Works on `Product.objects.values()` rows and formats them the same way
+    ProductSerializer would, skipping per-field DRF overhead and model
+    instantiation. Only use it for output.
+    """
+    # Serializer fields backed by differently named columns
+    SOURCES = {
+        'image_url': ('image',),
+        'seller': ('seller_id',),
+        'image_srcset': ('image', 'image_renditions'),
+        'additional_images_srcset': ('additional_images', 'image_renditions'),
+        'rating_histogram': HISTOGRAM_FIELDS,
+    }
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, fields, request=None):
+        self.fields = [name for name in ProductSerializer.Meta.fields if name in fields]
+        self.request = request
+
+    @classmethod
+    def columns_for(cls, fields):
+        columns = {'id'}
+        for name in fields:
+            columns.update(cls.SOURCES.get(name, (name,)))
+        return sorted(columns)
+
+    def image(self, name):
+        if not name:
+            return None
+        url = default_storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+    def to_representation(self, row):
+        data = {}
+        for name in self.fields:
+            if name == 'image_srcset':
+                data[name] = image_srcsets(row['image'], (), row['image_renditions'], self.request)[0]
+                continue
+            if name == 'additional_images_srcset':
+                data[name] = image_srcsets(None, row['additional_images'], row['image_renditions'], self.request)[1]
+                continue
+            if name == 'rating_histogram':
+                data[name] = rating_histogram(row)
+                continue
+            value = row[self.SOURCES.get(name, (name,))[0]]
+            if name in ('image', 'image_url'):
+                value = self.image(value)
+            elif isinstance(value, datetime):
+                value = self.datetime_field.to_representation(value)
+            elif isinstance(value, (Decimal, uuid.UUID)):
+                value = str(value)
+            data[name] = value
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+class ProductSnapshotSerializer(serializers.ModelSerializer):
+    """Minimal product embedded in orders."""
+    image_url = serializers.ImageField(source='image', read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ('id', 'name', 'brand', 'category', 'price', 'sale_price', 'image_url')
+        read_only_fields = fields
+
+# Columns ProductSnapshotSerializer reads, for only() on prefetches
+PRODUCT_SNAPSHOT_COLUMNS = ('id', 'name', 'brand', 'category', 'price', 'sale_price', 'image')
+
+class OrderItemVariantSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductVariant
+        fields = ('sku', 'size', 'color')
+        read_only_fields = fields
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = ProductSnapshotSerializer(read_only=True)
     product_id = serializers.UUIDField(write_only=True)
+    variant = OrderItemVariantSerializer(read_only=True)
 
     class Meta:
         model = OrderItem
-        fields = ('id', 'product', 'product_id', 'quantity', 'price_at_purchase')
+        fields = ('id', 'product', 'product_id', 'variant', 'quantity', 'price_at_purchase')
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
@@ -76,7 +279,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ('user', 'created_at')
 
 class WishlistSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = ProductSerializer(read_only=True, fields=PRODUCT_CARD_FIELDS)
     product_id = serializers.UUIDField(write_only=True)
 
     class Meta:
@@ -89,3 +292,9 @@ class ContactMessageSerializer(serializers.ModelSerializer):
         model = ContactMessage
         fields = '__all__'
         read_only_fields = ('id', 'created_at')
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'status', 'result', 'last_error', 'attempts', 'max_attempts', 'run_at', 'created_at', 'updated_at')
+        read_only_fields = fields
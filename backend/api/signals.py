@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache as response_cache
+from . import facets, jobs, pricing, ratings, rollups, search, wishlists
+from .autocomplete import AUTOCOMPLETE_FIELDS, autocomplete
+from .images import image_sources
+from .models import Order, PageContent, Product, Review, Wishlist
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(pre_save, sender=Product)
+def remember_facet_values(sender, instance, update_fields=None, **kwargs):
+    # Keep the stored values so post_save can move counts between buckets
+    instance._facet_previous = []
+    if instance._state.adding or not _touches(update_fields, facets.FACET_SOURCE_FIELDS):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values(*facets.FACET_SOURCE_FIELDS).first()
+    if previous:
+        instance._facet_previous = facets.facet_entries(previous)
+
+
+@receiver(post_save, sender=Product)
+def update_facet_index(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw or not _touches(update_fields, facets.FACET_SOURCE_FIELDS):
+        return
+    facets.apply_delta(getattr(instance, '_facet_previous', []), facets.facet_entries(instance))
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_facet_index(sender, instance, **kwargs):
+    facets.apply_delta(facets.facet_entries(instance), [])
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _touches(update_fields, search.SEARCH_FIELDS):
+        return
+    search.reindex_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_products([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def refresh_autocomplete(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _touches(update_fields, AUTOCOMPLETE_FIELDS):
+        return
+    transaction.on_commit(autocomplete.invalidate)
+
+
+@receiver(post_delete, sender=Product)
+def drop_from_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(autocomplete.invalidate)
+
+
+@receiver(post_save, sender=Product)
+def queue_image_renditions(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _touches(update_fields, ('image', 'additional_images')):
+        return
+    sources = image_sources(instance.image.name if instance.image else None, instance.additional_images, settings.MEDIA_URL)
+    if set(sources) != set(instance.image_renditions):
+        jobs.enqueue('generate_product_images', {'product_ids': [str(instance.pk)]})
+
+
+@receiver(post_save, sender=Product)
+def schedule_flash_sale(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _touches(update_fields, Product.PRICING_FIELDS) or instance.discount_percentage <= 0:
+        return
+    now = timezone.now()
+    upcoming = [moment for moment in (instance.flash_sale_start, instance.flash_sale_end) if moment and moment > now]
+    if upcoming:
+        pricing.schedule(min(upcoming))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_responses(sender, **kwargs):
+    transaction.on_commit(lambda: response_cache.bump(response_cache.PRODUCTS))
+
+
+@receiver(post_save, sender=PageContent)
+@receiver(post_delete, sender=PageContent)
+def invalidate_page_responses(sender, **kwargs):
+    transaction.on_commit(lambda: response_cache.bump(response_cache.PAGES))
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, update_fields=None, **kwargs):
+    instance._rating_previous = None
+    if instance._state.adding or not _touches(update_fields, ('product', 'rating')):
+        return
+    instance._rating_previous = sender.objects.filter(pk=instance.pk).values('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def update_product_rating(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches(update_fields, ('product', 'rating')):
+        return
+    contributions = []
+    previous = getattr(instance, '_rating_previous', None)
+    if previous:
+        contributions.append((previous['product_id'], previous['rating'], -1))
+    contributions.append((instance.product_id, instance.rating, 1))
+    ratings.apply(contributions)
+
+
+@receiver(post_delete, sender=Review)
+def remove_product_rating(sender, instance, **kwargs):
+    ratings.apply([(instance.product_id, instance.rating, -1)])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, **kwargs):
+    transaction.on_commit(lambda: response_cache.bump(response_cache.REVIEWS))
+
+
+@receiver(post_save, sender=Wishlist)
+@receiver(post_delete, sender=Wishlist)
+def invalidate_wishlist_ids(sender, instance, **kwargs):
+    transaction.on_commit(lambda: wishlists.invalidate(instance.user_id))
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_rollup(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_previous = None
+    if instance._state.adding or not _touches(update_fields, rollups.ROLLUP_SOURCE_FIELDS):
+        return
+    instance._rollup_previous = sender.objects.filter(pk=instance.pk).values(*rollups.ROLLUP_SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=Order)
+def update_order_rollup(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches(update_fields, rollups.ROLLUP_SOURCE_FIELDS):
+        return
+    contributions = []
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        contributions.append((previous['created_at'], previous['status'], previous['total_amount'], -1))
+    contributions.append((instance.created_at, instance.status, instance.total_amount, 1))
+    rollups.apply(contributions)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_rollup(sender, instance, **kwargs):
+    rollups.apply([(instance.created_at, instance.status, instance.total_amount, -1)])
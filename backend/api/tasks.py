@@ -0,0 +1,142 @@
+"""Background job handlers (see api/jobs.py)."""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import send_mail
+from PIL import Image
+
+from . import cache as response_cache
+from . import pricing
+from .images import FORMATS, image_sources, render_renditions, rendition_name
+from .importer import ArchiveError, ProductImporter
+from .jobs import job
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+
+@job('send_password_reset_email', redact=('code',))
+def send_password_reset_email(payload):
+    email, code = payload['email'], payload['code']
+    if not settings.EMAIL_HOST_USER:
+        # No mail server configured (local/dev); the code stays in PasswordResetToken
+        logger.warning("EMAIL_HOST_USER is not set; password reset email to %s not sent", email)
+        return {'delivered': False}
+    send_mail(
+        'Your SmartShop password reset code',
+        f'Your password reset code is {code}. It expires in 15 minutes.',
+        settings.DEFAULT_FROM_EMAIL,
+        [email],
+    )
+    return {'delivered': True}
+
+
+@job('import_products')
+def import_products(payload):
+    seller = get_user_model().objects.get(pk=payload['seller_id'])
+    path = payload['path']
+    try:
+        with default_storage.open(path, 'rb') as archive:
+            return ProductImporter(archive, seller=seller).run().report()
+    except ArchiveError as e:
+        # Not retryable; report it like the synchronous endpoint used to
+        return {'message': str(e), 'created': 0, 'skipped': 0, 'errors': [str(e)]}
+    finally:
+        default_storage.delete(path)
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """Process pool for Pillow work, shared by all job threads of this worker."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: forking a multi-threaded worker can deadlock in the child
+            _render_pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+    return _render_pool
+
+
+def _reset_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        _render_pool = None
+
+
+def _store_renditions(source, rendered, previous=None):
+    entry = {}
+    for name, variant in rendered.items():
+        entry[name] = {'width': variant['width']}
+        for key, _, _ in FORMATS:
+            entry[name][key] = default_storage.save(rendition_name(source, name, key), ContentFile(variant[key]))
+    # Saved names carry a content hash, so re-renders don't overwrite; drop the old files
+    for name, variant in (previous or {}).items():
+        for key, _, _ in FORMATS:
+            old = variant.get(key)
+            if old and old != entry.get(name, {}).get(key):
+                default_storage.delete(old)
+    return entry
+
+
+def update_renditions(product, force=False):
+    """Render missing renditions for `product`; returns how many sources were rendered."""
+    sources = image_sources(product.image.name if product.image else None, product.additional_images, settings.MEDIA_URL)
+    renditions = {}
+    pending = {}
+    for source in sources:
+        if source in product.image_renditions and not force:
+            renditions[source] = product.image_renditions[source]
+        elif default_storage.exists(source):
+            with default_storage.open(source, 'rb') as f:
+                pending[source] = render_pool().submit(render_renditions, f.read())
+
+    rendered = 0
+    for source, future in pending.items():
+        try:
+            renditions[source] = _store_renditions(source, future.result(), product.image_renditions.get(source))
+            rendered += 1
+        except BrokenProcessPool:
+            # A render process died (e.g. OOM on a huge image); start a fresh pool for the retry
+            _reset_render_pool()
+            raise
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # Skip this source (unreadable, or over Pillow's pixel limit); the others still render
+            logger.warning("Could not render %s for product %s: %s", source, product.pk, e)
+
+    if renditions != product.image_renditions:
+        # update() keeps updated_at (and skips signals); the guard drops results for
+        # a product whose images changed meanwhile, its own job will redo them
+        Product.objects.filter(pk=product.pk, updated_at=product.updated_at).update(image_renditions=renditions)
+    return rendered
+
+
+@job('generate_product_images')
+def generate_product_images(payload):
+    rendered = 0
+    products = Product.objects.filter(pk__in=payload['product_ids']).only(
+        'id', 'image', 'additional_images', 'image_renditions', 'updated_at'
+    )
+    for product in products:
+        rendered += update_renditions(product, force=payload.get('force', False))
+    if rendered:
+        response_cache.bump(response_cache.PRODUCTS)
+    return {'rendered': rendered}
+
+
+@job(pricing.JOB_NAME)
+def refresh_flash_sales(payload):
+    changed = pricing.refresh_sales()
+    next_run = pricing.schedule_next()
+    return {'changed': changed, 'next_run': next_run.isoformat()}
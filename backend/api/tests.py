@@ -0,0 +1,207 @@
+import base64
+import io
+import json
+import random
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.management.commands.check_query_plans import Command as QueryPlanCommand
+from api.models import Address, Affiliate, Order, OrderItem, Product, Review, User, Wishlist
+from api.views import AffiliateViewSet, OrderViewSet, ReviewViewSet, UserViewSet, WishlistViewSet
+
+# Result sizes each list endpoint is requested at; the query count must not change with them
+SIZES = (1, 5, 20)
+
+
+@override_settings(
+    QUERY_BUDGET_MODE='raise',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class QueryBudgetTests(TestCase):
+    """
+    List endpoints stay within their query budget, and the number of queries
+    does not grow with the number of rows returned. 'raise' mode turns an
+    over-budget request into a QueryBudgetExceeded error.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='pw', role='admin')
+        self.customer = User.objects.create_user(username='customer', email='customer@example.com', password='pw')
+
+    def client_for(self, user):
+        # A real bearer token, so the user lookup counts as in production
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def make_products(self, count, start=0):
+        return [
+            Product.objects.create(
+                seller=self.admin, name=f'Product {start + i}', description='Test', price=Decimal('10.00') + i,
+                category='Men', subcategory='Tops', brand='Brand', stock_quantity=10,
+            )
+            for i in range(count)
+        ]
+
+    def assert_constant_queries(self, client, url, budget, grow):
+        """Request `url` at every size in SIZES, calling `grow(n)` to add rows first."""
+        counts = []
+        total = 0
+        for size in SIZES:
+            # Cache invalidation runs on commit
+            with self.captureOnCommitCallbacks(execute=True):
+                grow(size - total)
+            total = size
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            counts.append(len(queries))
+        self.assertLessEqual(max(counts), budget, f'{url} ran {counts} queries for {SIZES} rows')
+        self.assertEqual(len(set(counts)), 1, f'{url} ran {counts} queries for {SIZES} rows')
+
+    def test_order_list(self):
+        def grow(count):
+            for product in self.make_products(count, start=Order.objects.count()):
+                order = Order.objects.create(user=self.customer, customer_name='Customer', total_amount=product.price * 2)
+                OrderItem.objects.create(order=order, product=product, quantity=2, price_at_purchase=product.price)
+        budget = OrderViewSet.query_budget['list']
+        self.assert_constant_queries(self.client_for(self.customer), '/api/orders/?page_size=50', budget, grow)
+
+    def test_order_list_admin(self):
+        def grow(count):
+            for product in self.make_products(count, start=Order.objects.count()):
+                order = Order.objects.create(user=self.customer, customer_name='Customer', total_amount=product.price)
+                OrderItem.objects.create(order=order, product=product, quantity=1, price_at_purchase=product.price)
+        budget = OrderViewSet.query_budget['list']
+        self.assert_constant_queries(self.client_for(self.admin), '/api/orders/?page_size=50', budget, grow)
+
+    def test_review_list(self):
+        product = self.make_products(1)[0]
+
+        def grow(count):
+            start = Review.objects.count()
+            for i in range(count):
+                reviewer = User.objects.create_user(username=f'reviewer{start + i}', email=f'reviewer{start + i}@example.com')
+                Review.objects.create(product=product, user=reviewer, rating=4, comment='Good')
+        budget = ReviewViewSet.query_budget['list']
+        self.assert_constant_queries(APIClient(), f'/api/reviews/?product={product.pk}&page_size=50', budget, grow)
+
+    def test_wishlist_list(self):
+        def grow(count):
+            for product in self.make_products(count, start=Wishlist.objects.count()):
+                Wishlist.objects.create(user=self.customer, product=product)
+        budget = WishlistViewSet.query_budget['list']
+        self.assert_constant_queries(self.client_for(self.customer), '/api/wishlist/?page_size=50', budget, grow)
+
+    def test_affiliate_list(self):
+        def grow(count):
+            start = Affiliate.objects.count()
+            for i in range(count):
+                user = User.objects.create_user(username=f'affiliate{start + i}', email=f'affiliate{start + i}@example.com')
+                Affiliate.objects.create(user=user, referral_code=f'REF{start + i}')
+        budget = AffiliateViewSet.query_budget['list']
+        self.assert_constant_queries(self.client_for(self.admin), '/api/affiliates/', budget, grow)
+
+    def test_user_list(self):
+        def grow(count):
+            start = User.objects.count()
+            for i in range(count):
+                user = User.objects.create_user(username=f'user{start + i}', email=f'user{start + i}@example.com')
+                Address.objects.create(
+                    user=user, full_name='Test User', street='1 Main St', city='Town', state='State',
+                    postal_code='00000', country='US', phone='555-0100',
+                )
+        budget = UserViewSet.query_budget['list']
+        self.assert_constant_queries(self.client_for(self.admin), '/api/users/', budget, grow)
+
+
+def encode_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(username='seller', email='seller@example.com', password='pw', role='seller')
+        for i in range(5):
+            Product.objects.create(
+                seller=seller, name=f'Product {i}', description='Test', price=Decimal('10.00') + i,
+                category='Men', subcategory='Tops', brand='Brand', stock_quantity=10,
+            )
+        self.client = APIClient()
+
+    def test_pages_follow_cursor(self):
+        url = '/api/products/?page_size=2&ordering=effective_price&view=card'
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            names += [product['name'] for product in data['results']]
+            url = data['next']
+        self.assertEqual(names, [f'Product {i}' for i in range(5)])
+
+    def test_malformed_cursor_is_not_found(self):
+        # ?ordering=effective_price pages on (effective_price, id)
+        cursors = [
+            'not base64!',
+            encode_cursor({'x': 1}),
+            encode_cursor({'v': 'x'}),
+            encode_cursor({'v': ['x', 'y', 'z']}),
+            encode_cursor({'v': ['12.00']}),
+            encode_cursor({'v': ['x', 'y']}),
+            encode_cursor({'v': ['12.00', 'not-a-uuid']}),
+            encode_cursor({'v': [None, None]}),
+            encode_cursor({'v': [[1], {'a': 1}]}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/products/', {'ordering': 'effective_price', 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_malformed_datetime_cursor_is_not_found(self):
+        # Reviews page on (-created_at, -id)
+        response = self.client.get('/api/reviews/', {'cursor': encode_cursor({'v': ['yesterday', 'abc']})})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    ALLOWED_HOSTS=['testserver', 'shop.example.com'],
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(username='seller', email='seller@example.com', password='pw', role='seller')
+        for i in range(3):
+            Product.objects.create(
+                seller=seller, name=f'Product {i}', description='Test', price=Decimal('10.00') + i,
+                category='Men', subcategory='Tops', brand='Brand', stock_quantity=10,
+            )
+
+    def test_absolute_urls_follow_host_and_scheme(self):
+        client = APIClient()
+        for host, secure in (('testserver', False), ('shop.example.com', False), ('shop.example.com', True)):
+            with self.subTest(host=host, secure=secure):
+                response = client.get('/api/products/', {'page_size': 1}, HTTP_HOST=host, secure=secure)
+                scheme = 'https' if secure else 'http'
+                self.assertTrue(response.json()['next'].startswith(f'{scheme}://{host}/'))
+
+
+class QueryPlanTests(TestCase):
+    """
+    The indexed list, filter, search and variant paths read the catalog and
+    order tables through an index, as `manage.py check_query_plans` checks
+    against a full-size catalog.
+    """
+
+    def test_no_sequential_scans(self):
+        command = QueryPlanCommand(stdout=io.StringIO())
+        command.rng = random.Random(1)
+        command.seed(product_count=2000, order_count=2000)
+        failures = command.check_all()
+        self.assertEqual(failures, [], command.stdout.getvalue())
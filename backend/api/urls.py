@@ -5,10 +5,10 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from .views import (
-    ProductViewSet, OrderViewSet, UserViewSet, DashboardStatsView, PaymentViewSet, 
+    ProductViewSet, OrderViewSet, UserViewSet, DashboardStatsView, DatabasePoolStatsView, PaymentViewSet, 
     RegisterView, PageContentViewSet, AffiliateViewSet, CategoryViewSet,
     RequestPasswordResetView, VerifyResetCodeView, ResetPasswordView, ReviewViewSet, BulkProductUploadView,
-    SubmitInquiryView, WishlistViewSet, ContactMessageViewSet, AddressViewSet
+    SubmitInquiryView, WishlistViewSet, ContactMessageViewSet, AddressViewSet, JobViewSet
 )
 
 from rest_framework.routers import SimpleRouter, DefaultRouter
@@ -26,16 +26,19 @@ router.register(r'reviews', ReviewViewSet)
 router.register(r'wishlist', WishlistViewSet, basename='wishlist')
 router.register(r'contact-messages', ContactMessageViewSet, basename='contact-messages')
 router.register(r'addresses', AddressViewSet, basename='addresses')
+router.register(r'jobs', JobViewSet, basename='jobs')
 
 urlpatterns = [
+    # Before the router, otherwise products/<pk>/ swallows it
+    path('products/bulk_upload/', BulkProductUploadView.as_view(), name='product-bulk-upload'),
     path('', include(router.urls)),
     path('auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('products/bulk_upload/', BulkProductUploadView.as_view(), name='product-bulk-upload'),
     path('auth/register/', RegisterView.as_view(), name='auth_register'),
     path('auth/password-reset/request/', RequestPasswordResetView.as_view(), name='password_reset_request'),
     path('auth/password-reset/verify/', VerifyResetCodeView.as_view(), name='password_reset_verify'),
     path('auth/password-reset/confirm/', ResetPasswordView.as_view(), name='password_reset_confirm'),
     path('inquiries/', SubmitInquiryView.as_view(), name='submit_inquiry'),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard_stats'),
+    path('dashboard/db-pool/', DatabasePoolStatsView.as_view(), name='dashboard_db_pool'),
 ]
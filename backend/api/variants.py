@@ -0,0 +1,74 @@
+"""
+Size/color variants (ProductVariant rows).
+
+The API still reads and writes `variants` as a `[{size, color, stock}]`
+list; `sync_variants` turns a submitted list into row inserts, updates
+and deletes, keeping existing SKUs for combinations that survive.
+"""
+import re
+
+from .models import ProductVariant
+
+_SKU_PART = re.compile(r'[^A-Z0-9]+')
+
+
+def _sku_part(value):
+    return _SKU_PART.sub('', (value or '').upper())[:12] or 'NA'
+
+
+def make_sku(product, size, color):
+    return f'{product.pk.hex[:10].upper()}-{_sku_part(size)}-{_sku_part(color)}'
+
+
+def normalize(entries):
+    """Validate a submitted variant list into {(size, color): stock}; raises ValueError."""
+    if not isinstance(entries, list):
+        raise ValueError('Variants must be a list.')
+    variants = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError('Each variant must be an object with size, color and stock.')
+        size = str(entry.get('size') or '').strip()[:50]
+        color = str(entry.get('color') or '').strip()[:50]
+        try:
+            stock = int(entry.get('stock') or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid stock for variant {size}/{color}.")
+        if stock < 0:
+            raise ValueError(f"Stock for variant {size}/{color} cannot be negative.")
+        variants[(size, color)] = stock
+    return variants
+
+
+def sync_variants(product, variants):
+    """Make the product's variant rows match `variants` ({(size, color): stock})."""
+    existing = {(variant.size, variant.color): variant for variant in product.product_variants.all()}
+    stale = [variant.pk for key, variant in existing.items() if key not in variants]
+    if stale:
+        ProductVariant.objects.filter(pk__in=stale).delete()
+
+    changed = []
+    for key, stock in variants.items():
+        variant = existing.get(key)
+        if variant is not None and variant.stock != stock:
+            variant.stock = stock
+            changed.append(variant)
+    if changed:
+        ProductVariant.objects.bulk_update(changed, ['stock'])
+
+    skus = {variant.sku for key, variant in existing.items() if key in variants}
+    created = []
+    for (size, color), stock in variants.items():
+        if (size, color) in existing:
+            continue
+        sku = base = make_sku(product, size, color)
+        suffix = 1
+        while sku in skus:
+            # e.g. sizes "M/L" and "ML" reduce to the same SKU part
+            suffix += 1
+            sku = f'{base}-{suffix}'
+        skus.add(sku)
+        created.append(ProductVariant(product=product, sku=sku, size=size, color=color, stock=stock))
+    ProductVariant.objects.bulk_create(created)
+    # Drop any prefetched rows so the response shows what was just written
+    getattr(product, '_prefetched_objects_cache', {}).pop('product_variants', None)
@@ -1,6 +1,6 @@
 from rest_framework import viewsets, permissions, status, filters, parsers
-from django.db.models import Sum
-from django.db.models.functions import ExtractMonth
+from django.db.models import Case, Exists, F, OuterRef, Prefetch, Q, Value, When, prefetch_related_objects
+from django.db.models.functions import Upper
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -10,10 +10,23 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 import resend
 from django.conf import settings
+from django.core.files.storage import default_storage
+import os
 import random
+import uuid
+import zipfile
 from datetime import timedelta
-from .models import Product, Order, OrderItem, Payment, PageContent, Affiliate, PasswordResetToken, Review, Wishlist, ContactMessage, Address
-from .serializers import ProductSerializer, OrderSerializer, UserSerializer, PaymentSerializer, PageContentSerializer, AffiliateSerializer, ReviewSerializer, WishlistSerializer, ContactMessageSerializer, AddressSerializer
+from core.db import pool as connection_pool
+from .models import Product, ProductVariant, Order, OrderItem, Payment, PageContent, Affiliate, PasswordResetToken, Review, Wishlist, ContactMessage, Address, Job
+from . import cache as response_cache
+from . import jobs, rollups, wishlists
+from .autocomplete import autocomplete
+from .facets import indexed_facets, queryset_facets
+from .pagination import KeysetPagination
+from .query_budget import QueryBudgetMixin
+from .ranking import plan_ranks
+from .search import search_products
+from .serializers import PRODUCT_CARD_FIELDS, PRODUCT_SNAPSHOT_COLUMNS, ProductRowSerializer, ProductSerializer, OrderSerializer, UserSerializer, PaymentSerializer, PageContentSerializer, AffiliateSerializer, ReviewSerializer, WishlistSerializer, ContactMessageSerializer, AddressSerializer, JobSerializer
 
 # ...
 
@@ -27,12 +40,22 @@ class SubmitInquiryView(APIView):
             return Response({'message': 'Inquiry received and saved.'}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class WishlistViewSet(viewsets.ModelViewSet):
+class WishlistViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
+    # ?view=ids and contains are answered from the per-user ID set (api/wishlists.py)
+    query_budget = {'list': 2, 'retrieve': 2, 'contains': 2, 'toggle': 5}
+    max_contains = 500
 
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        return Wishlist.objects.filter(user=self.request.user).select_related('product')
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('view') == 'ids':
+            return Response(wishlists.product_ids(request.user.pk))
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         product_id = serializer.validated_data.get('product_id')
@@ -45,24 +68,54 @@ class WishlistViewSet(viewsets.ModelViewSet):
             
         serializer.save(user=self.request.user, product=product)
 
+    @action(detail=False, methods=['post'], parser_classes=[parsers.JSONParser])
+    def contains(self, request):
+        """
+        {product_ids: [...]} -> {contains: [bool, ...] in request order,
+        product_ids: [the wishlisted subset]}.
+        """
+        product_ids = request.data.get('product_ids')
+        if not isinstance(product_ids, list) or len(product_ids) > self.max_contains:
+            return Response({'error': f"Send 'product_ids' as a list of at most {self.max_contains} ids."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            wanted = [uuid.UUID(str(pk)) for pk in product_ids]
+        except ValueError:
+            return Response({'error': 'Invalid product id.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        saved = set(wishlists.product_ids(request.user.pk))
+        contains = [str(pk) in saved for pk in wanted]
+        return Response({
+            'contains': contains,
+            'product_ids': [str(pk) for pk, present in zip(wanted, contains) if present],
+        })
+
     @action(detail=False, methods=['post'])
     def toggle(self, request):
         product_id = request.data.get('product_id')
         if not product_id:
             return Response({'error': 'Product ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            product_id = uuid.UUID(str(product_id))
+        except ValueError:
+            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        from django.db import IntegrityError, transaction
+        entries = Wishlist.objects.filter(user=request.user, product_id=product_id)
+        # The cached ID set picks the likely branch; the writes themselves decide
+        if str(product_id) in wishlists.product_ids(request.user.pk) and entries.delete()[0]:
+            return Response({'status': 'removed', 'in_wishlist': False})
 
+        if not Product.objects.filter(id=product_id).exists():
+            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-             return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        wishlist_item = Wishlist.objects.filter(user=request.user, product=product).first()
-        if wishlist_item:
-            wishlist_item.delete()
+            with transaction.atomic():
+                Wishlist.objects.create(user=request.user, product_id=product_id)
+        except IntegrityError:
+            # Already saved (stale cache or a concurrent toggle): toggling removes it
+            entries.delete()
             return Response({'status': 'removed', 'in_wishlist': False})
-        else:
-            Wishlist.objects.create(user=request.user, product=product)
-            return Response({'status': 'added', 'in_wishlist': True})
+        return Response({'status': 'added', 'in_wishlist': True})
 
 User = get_user_model()
 
@@ -107,11 +160,19 @@ class RegisterView(APIView):
 
 
 class ProductFilter(django_filters.FilterSet):
-    min_price = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
-    max_price = django_filters.NumberFilter(field_name="price", lookup_expr='lte')
+    # Price the customer pays (sale price while a sale runs), see api/pricing.py
+    min_price = django_filters.NumberFilter(field_name="effective_price", lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name="effective_price", lookup_expr='lte')
     # ordering is handled by OrderingFilter backend, but we can verify it here
 
+    min_rating = django_filters.NumberFilter(field_name="rating_avg", lookup_expr='gte')
     on_sale = django_filters.BooleanFilter(method='filter_on_sale')
+    flash_sale = django_filters.BooleanFilter(method='filter_flash_sale')
+
+    # Variant availability; combined in filter_queryset so they match the same variant row
+    size = django_filters.CharFilter(method='filter_variants')
+    color = django_filters.CharFilter(method='filter_variants')
+    in_stock = django_filters.BooleanFilter(method='filter_variants')
 
     class Meta:
         model = Product
@@ -119,27 +180,54 @@ class ProductFilter(django_filters.FilterSet):
 
     def filter_on_sale(self, queryset, name, value):
         if value:
-            return queryset.filter(discount_percentage__gt=0)
+            return queryset.filter(sale_price__isnull=False)
+        return queryset
+
+    def filter_flash_sale(self, queryset, name, value):
+        # Running sales with an end time; sale_price is only set inside the window
+        if value:
+            return queryset.filter(sale_price__isnull=False, flash_sale_end__isnull=False)
         return queryset
 
+    def filter_variants(self, queryset, name, value):
+        # Applied once for all three fields in filter_queryset
+        return queryset
 
-class CategoryViewSet(viewsets.ViewSet):
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        size = self.form.cleaned_data.get('size')
+        color = self.form.cleaned_data.get('color')
+        in_stock = self.form.cleaned_data.get('in_stock')
+        if not size and not color:
+            if in_stock:
+                return queryset.filter(stock_quantity__gt=0)
+            return queryset
+
+        # EXISTS over the (UPPER(size), UPPER(color), stock) variant index. Compared as
+        # UPPER(column) = UPPER(value) so the expression matches the index on every
+        # backend (iexact compiles to LIKE on SQLite and UPPER(col::text) on Postgres)
+        variants = ProductVariant.objects.filter(product=OuterRef('pk'))
+        if size:
+            variants = variants.alias(size_key=Upper('size')).filter(size_key=Upper(Value(size)))
+        if color:
+            variants = variants.alias(color_key=Upper('color')).filter(color_key=Upper(Value(color)))
+        if in_stock:
+            variants = variants.filter(stock__gt=0)
+        return queryset.filter(Exists(variants))
+
+
+class CategoryViewSet(response_cache.CachedResponseMixin, viewsets.ViewSet):
     permission_classes = [permissions.AllowAny]
+    cache_namespaces = (response_cache.PRODUCTS,)
 
     def list(self, request):
-        items = Product.objects.values('category', 'subcategory').distinct()
+        # Served from the maintained facet index instead of a DISTINCT scan over products
         data = {}
-        for item in items:
-            cat = item['category']
-            sub = item['subcategory']
-            if cat:
-                if cat not in data:
-                    data[cat] = []
-                if sub and sub not in data[cat]:
-                    data[cat].append(sub)
+        for category in indexed_facets()['categories']:
+            data[category['value']] = [sub['value'] for sub in category['subcategories']]
         return Response(data)
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(QueryBudgetMixin, response_cache.CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -147,7 +235,44 @@ class ProductViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = ProductFilter
     search_fields = ['name', 'description']
-    ordering_fields = ['price', 'created_at']
+    ordering_fields = ['price', 'effective_price', 'created_at', 'display_order', 'rating_avg', 'rating_count']
+    pagination_class = KeysetPagination
+    cursor_ordering = ('display_order', '-created_at', 'id')
+    cache_namespaces = (response_cache.PRODUCTS, response_cache.REVIEWS)
+    cache_actions = ('list', 'retrieve', 'facets', 'search')
+    # Filtered facets run one grouped aggregate per facet (6); unfiltered ones read the index
+    query_budget = {'list': 2, 'retrieve': 2, 'search': 3, 'suggestions': 2, 'facets': 6}
+
+    def get_requested_fields(self):
+        """Sparse fieldset from ?view=card and/or ?fields=a,b,c (None means every field)."""
+        params = self.request.query_params
+        fields = set()
+        if params.get('view') == 'card':
+            fields.update(PRODUCT_CARD_FIELDS)
+        if params.get('fields'):
+            fields.update(name.strip() for name in params['fields'].split(','))
+        fields &= set(ProductSerializer.Meta.fields)
+        return tuple(fields) or None
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method == 'GET':
+            kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is None or 'variants' in fields:
+            return super().list(request, *args, **kwargs)
+
+        # Sparse lists select only the needed columns and skip DRF field serialization
+        row_serializer = ProductRowSerializer(fields, request)
+        # Keyset cursors read the ordering columns from each row
+        columns = set(row_serializer.columns_for(fields)) | set(self.ordering_fields)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(queryset))
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -155,7 +280,19 @@ class ProductViewSet(viewsets.ModelViewSet):
         # with filterset_class defined properly above, min_price/max_price should work automatically.
         # The issue might be that previous implementations mixed get_queryset with filter_backends.
         # By strictly using django-filters (ProductFilter class), we ensure clean logic.
-        return queryset
+        return queryset.prefetch_related('product_variants')
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts per category/subcategory/brand/gender/price range/on-sale for
+        the current filter query. Unfiltered requests read the facet index.
+        """
+        filter_params = set(ProductFilter.base_filters) | {filters.SearchFilter.search_param}
+        if not filter_params & set(request.query_params):
+            return Response(indexed_facets())
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(queryset_facets(queryset))
 
     @action(detail=False, methods=['get'])
     def search(self, request):
@@ -163,15 +300,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not query:
              return Response([])
         
-        from django.db.models import Q
-        # Search name, description, category, brand
-        products = Product.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) | 
-            Q(category__icontains=query) |
-            Q(brand__icontains=query)
-        ).distinct()[:20] # Limit results
-        
+        products = search_products(query, limit=20)
+        prefetch_related_objects(products, 'product_variants')
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
 
@@ -181,21 +311,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not query:
             return Response({"categories": [], "products": []})
         
-        # Categories matching the query
-        cats = Product.objects.filter(category__icontains=query).values_list('category', flat=True).distinct()[:3]
-        
-        # Products matching the query (rich results)
-        products = Product.objects.filter(
-            Q(name__icontains=query) | 
-            Q(brand__icontains=query)
-        ).distinct()[:5]
-        
-        product_serializer = self.get_serializer(products, many=True)
-        
-        return Response({
-            "categories": list(cats),
-            "products": product_serializer.data
-        })
+        # Answered from the in-memory prefix index; no database access per keystroke
+        return Response(autocomplete.suggest(query))
 
     def create(self, request, *args, **kwargs):
         try:
@@ -220,71 +337,139 @@ class ProductViewSet(viewsets.ModelViewSet):
         # Allow admins to create products (assign to themselves or handle normally)
         serializer.save(seller=user)
 
-    @action(detail=False, methods=['post'], url_path='reorder')
+    @action(detail=False, methods=['post'], url_path='reorder', parser_classes=[parsers.JSONParser])
     def reorder(self, request):
         """
-        Expects a list of objects with 'id' and 'display_order'.
-        Example: [{id: 1, display_order: 0}, {id: 2, display_order: 1}]
+        Either {order: [id, ...]}, the full new order of a list, which is
+        stored with sparse ranks so only moved products are written, or the
+        legacy {items: [{id, display_order}, ...]} with explicit ranks.
+        Returns the new rank of every listed product.
         """
-        items = request.data.get('items', [])
-        for item in items:
-            try:
-                obj = Product.objects.get(id=item['id'])
-                obj.display_order = item['display_order']
-                obj.save(update_fields=['display_order'])
-            except Product.DoesNotExist:
-                continue
-        return Response({'status': 'reordered'})
-
-class OrderViewSet(viewsets.ModelViewSet):
+        if request.user.role != 'admin':
+            return Response({'error': 'Only admins can reorder products.'}, status=status.HTTP_403_FORBIDDEN)
+
+        order = request.data.get('order')
+        items = request.data.get('items')
+        try:
+            if order is not None:
+                ids = [uuid.UUID(str(pk)) for pk in order]
+                explicit = None
+            elif items is not None:
+                ids = [uuid.UUID(str(item['id'])) for item in items]
+                explicit = [int(item['display_order']) for item in items]
+            else:
+                raise ValueError
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': "Send 'order' as a list of product ids or 'items' as [{id, display_order}]."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(set(ids)) != len(ids):
+            return Response({'error': 'Each product may appear only once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        from django.db import transaction
+        with transaction.atomic():
+            # One query validates every id and reads the current ranks
+            current = dict(Product.objects.select_for_update().filter(id__in=ids).values_list('id', 'display_order'))
+            missing = [str(pk) for pk in ids if pk not in current]
+            if missing:
+                return Response({'error': 'Unknown products.', 'ids': missing}, status=status.HTTP_400_BAD_REQUEST)
+
+            ranks = explicit if explicit is not None else plan_ranks([current[pk] for pk in ids])
+            changed = [Product(id=pk, display_order=rank) for pk, rank in zip(ids, ranks) if current[pk] != rank]
+            if changed:
+                # CASE WHEN id=... UPDATE, batched only where the backend limits parameters
+                Product.objects.bulk_update(changed, ['display_order'])
+                # bulk_update sends no signals
+                transaction.on_commit(lambda: response_cache.bump(response_cache.PRODUCTS))
+
+        return Response({
+            'status': 'reordered',
+            'updated': len(changed),
+            'ranks': {str(pk): rank for pk, rank in zip(ids, ranks)},
+        })
+
+class OrderViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
+    query_budget = {'list': 3, 'retrieve': 3}
 
     def get_queryset(self):
         user = self.request.user
+        # One query for orders, one for all their items with the product snapshot joined in
+        items = OrderItem.objects.select_related('product', 'variant').only(
+            'id', 'order_id', 'quantity', 'price_at_purchase',
+            'variant__sku', 'variant__size', 'variant__color',
+            *[f'product__{column}' for column in PRODUCT_SNAPSHOT_COLUMNS]
+        )
+        queryset = Order.objects.prefetch_related(Prefetch('items', queryset=items))
         if user.role == 'admin':
-            return Order.objects.all()
+            return queryset
         # Sellers see orders containing their products (complex logic, simplified here to 'see all' or 'see own')
         # For simplicity in this stage: Users see their own orders.
-        return Order.objects.filter(user=user)
+        return queryset.filter(user=user)
 
     def create(self, request, *args, **kwargs):
         # Custom creation logic to handle items transactionally
-        # Expects: { items: [{id, quantity, price}...], total_amount: 100, shipping_address: {...} }
+        # Expects: { items: [{id, quantity, price, sku?}...], total_amount: 100, shipping_address: {...} }
         data = request.data
         if not data.get('items'):
             return Response({"error": "No items provided"}, status=status.HTTP_400_BAD_REQUEST)
 
         from django.db import transaction
         try:
+            lines = self._checkout_lines(data.get('items'))
+            product_quantities = {}
+            for (product_id, _), (quantity, _) in lines.items():
+                product_quantities[product_id] = product_quantities.get(product_id, 0) + quantity
+
             with transaction.atomic():
+                # Lock every product in one query, always in primary key order, so
+                # concurrent checkouts queue up instead of deadlocking on each other
+                product_ids = sorted(product_quantities, key=str)
+                products = {
+                    product.id: product
+                    for product in Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')
+                }
+                if len(products) != len(product_ids):
+                    raise Product.DoesNotExist()
+
+                for product_id, quantity in product_quantities.items():
+                    product = products[product_id]
+                    if product.stock_quantity < quantity:
+                        raise ValueError(f"Insufficient stock for {product.name}. Available: {product.stock_quantity}")
+
+                # Single conditional UPDATE for all lines; the stock guard makes overselling impossible
+                # even if a row somehow escaped the lock above
+                guard = Q()
+                for product_id, quantity in product_quantities.items():
+                    guard |= Q(id=product_id, stock_quantity__gte=quantity)
+                updated = Product.objects.filter(guard).update(stock_quantity=Case(
+                    *[When(id=product_id, then=F('stock_quantity') - quantity) for product_id, quantity in product_quantities.items()],
+                    default=F('stock_quantity'),
+                ))
+                if updated != len(product_quantities):
+                    raise ValueError("Insufficient stock for one or more products")
+
+                variants = self._take_variant_stock(lines, products)
+
                 order = Order.objects.create(
                     user=request.user,
                     customer_name=data.get('customerName') or request.user.get_full_name(),
                     total_amount=data.get('totalPrice'),
                     status='pending'
                 )
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, product=products[product_id], variant=variants.get(sku),
+                              quantity=quantity, price_at_purchase=price)
+                    for (product_id, sku), (quantity, price) in lines.items()
+                ])
 
-                for item in data.get('items'):
-                    product = Product.objects.select_for_update().get(id=item['id'])
-                    
-                    quantity = int(item['quantity'])
-                    if product.stock_quantity < quantity:
-                        raise ValueError(f"Insufficient stock for {product.name}. Available: {product.stock_quantity}")
-                    
-                    # Decrement stock
-                    product.stock_quantity -= quantity
-                    product.save(update_fields=['stock_quantity'])
-
-                    OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        quantity=quantity,
-                        price_at_purchase=item['price']
-                    )
-
-                serializer = self.get_serializer(order)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
+                # Stock changed through update(), which sends no model signals
+                transaction.on_commit(lambda: response_cache.bump(response_cache.PRODUCTS))
+
+            serializer = self.get_serializer(order)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Product.DoesNotExist:
             return Response({"error": "One or more products not found"}, status=status.HTTP_404_NOT_FOUND)
         except ValueError as e:
@@ -292,42 +477,106 @@ class OrderViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def _take_variant_stock(lines, products):
+        """
+        Decrement stock of the variants named by SKU in `lines`, under the
+        product locks already held. Returns {sku: ProductVariant}.
+        """
+        wanted = {}
+        for (product_id, sku), (quantity, _) in lines.items():
+            if sku:
+                wanted[sku] = (product_id, quantity)
+        if not wanted:
+            return {}
+
+        variants = {
+            variant.sku: variant
+            for variant in ProductVariant.objects.select_for_update().filter(sku__in=wanted).order_by('id')
+        }
+        for sku, (product_id, quantity) in wanted.items():
+            variant = variants.get(sku)
+            product = products[product_id]
+            if variant is None or variant.product_id != product_id:
+                raise ValueError(f"Variant {sku} of {product.name} is no longer available")
+            if variant.stock < quantity:
+                label = ' / '.join(part for part in (variant.size, variant.color) if part and part != 'N/A')
+                raise ValueError(f"Insufficient stock for {product.name} ({label}). Available: {variant.stock}")
+
+        guard = Q()
+        for sku, (_, quantity) in wanted.items():
+            guard |= Q(sku=sku, stock__gte=quantity)
+        updated = ProductVariant.objects.filter(guard).update(stock=Case(
+            *[When(sku=sku, then=F('stock') - quantity) for sku, (_, quantity) in wanted.items()],
+            default=F('stock'),
+        ))
+        if updated != len(wanted):
+            raise ValueError("Insufficient stock for one or more variants")
+        return variants
+
+    @staticmethod
+    def _checkout_lines(items):
+        """Merge cart lines per product and variant: {(product_id, sku): (quantity, price)}."""
+        lines = {}
+        for item in items:
+            try:
+                product_id = uuid.UUID(str(item['id']))
+                quantity = int(item['quantity'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Each item needs a valid id and quantity")
+            if quantity <= 0:
+                raise ValueError("Quantity must be at least 1")
+            key = (product_id, str(item.get('sku') or '').strip() or None)
+            previous_quantity, _ = lines.get(key, (0, None))
+            lines[key] = (previous_quantity + quantity, item.get('price'))
+        return lines
+
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class PageContentViewSet(viewsets.ModelViewSet):
+class PageContentViewSet(response_cache.CachedResponseMixin, viewsets.ModelViewSet):
     queryset = PageContent.objects.all()
     serializer_class = PageContentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
+    cache_namespaces = (response_cache.PAGES,)
 
-class AffiliateViewSet(viewsets.ModelViewSet):
+class AffiliateViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     serializer_class = AffiliateSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2}
 
     def get_queryset(self):
         user = self.request.user
+        queryset = Affiliate.objects.select_related('user')
         if user.role == 'admin':
-            return Affiliate.objects.all()
-        return Affiliate.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(QueryBudgetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 3}
 
     def get_queryset(self):
         user = self.request.user
+        queryset = User.objects.prefetch_related('addresses')
         if user.role == 'admin':
-            return User.objects.all()
-        return User.objects.filter(id=user.id)
+            return queryset
+        return queryset.filter(id=user.id)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get', 'patch'], parser_classes=[parsers.JSONParser, parsers.MultiPartParser, parsers.FormParser])
     def me(self, request):
+        if request.method == 'PATCH':
+            serializer = self.get_serializer(request.user, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data)
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
@@ -335,33 +584,35 @@ class DashboardStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Calculate real data for dashboard
-        total_revenue_data = Order.objects.aggregate(total=Sum('total_amount'))
-        total_revenue = float(total_revenue_data['total'] or 0)
-        
-        total_orders = Order.objects.count()
+        # Order figures come from the pre-aggregated rollup tables (api/rollups.py),
+        # so their cost doesn't grow with order history
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            return Response({'error': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        total_revenue, total_orders = rollups.totals()
         total_products = Product.objects.count()
         total_users = User.objects.count()
 
-        # Monthly Trend (Last 12 months)
-        # Using a dictionary to store month-wise revenue
-        monthly_trend = [0] * 12
-        sales_by_month = Order.objects.annotate(month=ExtractMonth('created_at')).values('month').annotate(revenue=Sum('total_amount'))
-        
-        for entry in sales_by_month:
-            # Month is 1-indexed (Jan=1)
-            month_idx = entry['month'] - 1
-            if 0 <= month_idx < 12:
-                monthly_trend[month_idx] = float(entry['revenue'] or 0)
-        
         return Response({
-            "totalRevenue": total_revenue,
+            "totalRevenue": float(total_revenue),
             "totalOrders": total_orders,
             "totalProducts": total_products,
             "totalUsers": total_users,
-            "monthlyTrend": monthly_trend
+            "monthlyTrend": rollups.monthly_trend(year),
+            "year": year,
         })
 
+class DatabasePoolStatsView(APIView):
+    """Connection pool figures of the process answering (DB_POOL=True; see core/db/pool.py)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Only admins can view pool stats.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'pid': os.getpid(), 'pools': connection_pool.stats()})
+
 class RequestPasswordResetView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -392,13 +643,9 @@ class RequestPasswordResetView(APIView):
             expires_at=timezone.now() + timedelta(minutes=15)
         )
         
-        # Send Email (Mocking for now)
-        print(f"PASSWORD RESET CODE FOR {email}: {code}")
-        # In production without email service, we can't do much.
-        # For now, we mock success so the UI doesn't break.
-        
-        return Response({'message': 'Reset code sent successfully (Check console)'}, status=status.HTTP_200_OK)
-        
+        # Delivered by the job worker so SMTP latency stays off the request path
+        jobs.enqueue('send_password_reset_email', {'email': email, 'code': code}, user=user)
+
         return Response({'message': 'Reset code sent successfully'}, status=status.HTTP_200_OK)
 
 class VerifyResetCodeView(APIView):
@@ -458,12 +705,18 @@ class ResetPasswordView(APIView):
         except (User.DoesNotExist, PasswordResetToken.DoesNotExist):
             return Response({'error': 'Invalid code or email'}, status=status.HTTP_400_BAD_REQUEST)
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    queryset = Review.objects.all()
+class ReviewViewSet(QueryBudgetMixin, response_cache.CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = Review.objects.select_related('user')
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['product']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['product', 'rating']
+    ordering_fields = ['created_at', 'rating']
+    # ?product=&page_size= pages along the (product, -created_at, -id) index
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
+    cache_namespaces = (response_cache.REVIEWS,)
+    query_budget = {'list': 2, 'retrieve': 2}
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -506,88 +759,25 @@ class BulkProductUploadView(APIView):
         zip_file = request.FILES['file']
         if not zip_file.name.endswith('.zip'):
              return Response({'error': 'File must be a .zip file.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        import zipfile
-        import csv
-        import io
-        from django.core.files.base import ContentFile
-
-        try:
-            with zipfile.ZipFile(zip_file, 'r') as z:
-                # Find CSV file
-                csv_filename = None
-                for name in z.namelist():
-                    if name.endswith('.csv') and not name.startswith('__MACOSX'):
-                        csv_filename = name
-                        break
-                
-                if not csv_filename:
-                    return Response({'error': 'No CSV file found in the ZIP archive.'}, status=status.HTTP_400_BAD_REQUEST)
-
-                # Read CSV
-                with z.open(csv_filename) as csv_file:
-                    decoded_file = io.TextIOWrapper(csv_file, encoding='utf-8')
-                    reader = csv.DictReader(decoded_file)
-                    
-                    products_created = 0
-                    errors = []
-
-                    for row in reader:
-                        try:
-                            # Basic validation
-                            if not row.get('name') or not row.get('price'):
-                                continue
-
-                            product_data = {
-                                'name': row.get('name'),
-                                'description': row.get('description', ''),
-                                'price': row.get('price'),
-                                'stock_quantity': row.get('stock', 0),
-                                'category': row.get('category', 'Uncategorized'),
-                                'subcategory': row.get('subcategory', ''),
-                                'brand': row.get('brand', 'Generic'),
-                                'seller': request.user,
-                                'gender': row.get('gender', 'Unisex'),
-                                'is_featured': row.get('is_featured', 'false').lower() == 'true',
-                                'is_popular': row.get('is_popular', 'false').lower() == 'true'
-                            }
-
-                            product = Product.objects.create(**product_data)
-
-                            # Handle Image
-                            image_name = row.get('image_filename')
-                            if image_name:
-                                image_name = image_name.strip()
-                                # Try to find the file in the zip
-                                image_path_in_zip = None
-                                for z_name in z.namelist():
-                                    if z_name.endswith(image_name) and not z_name.startswith('__MACOSX'):
-                                        image_path_in_zip = z_name
-                                        break
-                                
-                                if image_path_in_zip:
-                                    img_data = z.read(image_path_in_zip)
-                                    product.image.save(image_name, ContentFile(img_data), save=True)
-
-                            products_created += 1
-
-                        except Exception as e:
-                            errors.append(f"Error processing row {row.get('name', 'unknown')}: {str(e)}")
-
-                    return Response({
-                        'message': f'Successfully uploaded {products_created} products.',
-                        'errors': errors
-                    }, status=status.HTTP_201_CREATED)
-
-        except zipfile.BadZipFile:
+        if not zipfile.is_zipfile(zip_file):
             return Response({'error': 'Invalid ZIP file.'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        zip_file.seek(0)
+
+        # Import runs in the job worker; the client polls /jobs/<id>/ for the report
+        path = default_storage.save(f'imports/{uuid.uuid4().hex}.zip', zip_file)
+        job = jobs.enqueue('import_products', {'path': path, 'seller_id': request.user.pk}, user=request.user, max_attempts=1)
+        return Response({
+            'message': 'Upload received. Products are being imported in the background.',
+            'errors': [],
+            'job': JobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
 
 class ContactMessageViewSet(viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all().order_by('-created_at')
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         # Only admins should see contact messages
@@ -609,3 +799,15 @@ class AddressViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'admin':
+            return Job.objects.all().order_by('-created_at')
+        return Job.objects.filter(created_by=user).order_by('-created_at')
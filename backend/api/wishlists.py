@@ -0,0 +1,37 @@
+"""
+Per-user wishlist ID sets.
+
+Product grids ask "which of these products are wishlisted?" for every
+card. The answer comes from one cached entry per user: the product IDs
+of their wishlist as strings, newest first. A miss costs a single
+`values_list` query; Wishlist signals drop the entry whenever a row is
+added or removed (see api/signals.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Wishlist
+
+KEY_PREFIX = 'wishlist:ids'
+TIMEOUT = getattr(settings, 'WISHLIST_CACHE_TIMEOUT', 24 * 3600)
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def product_ids(user_id):
+    """Wishlisted product IDs (UUID strings) of a user, newest first."""
+    ids = cache.get(_key(user_id))
+    if ids is None:
+        ids = [
+            str(product_id)
+            for product_id in Wishlist.objects.filter(user_id=user_id)
+            .order_by('-created_at', '-id').values_list('product_id', flat=True)
+        ]
+        cache.set(_key(user_id), ids, TIMEOUT)
+    return ids
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
@@ -0,0 +1,35 @@
+"""
+ASGI entry point (SERVER_MODE=asgi, see gunicorn.conf.py):
+
+    gunicorn --config gunicorn.conf.py   # runs core.asgi:application on uvicorn workers
+
+Catalog reads go to the async views in core/urls_async.py, so one worker
+keeps serving while slow queries or slow clients are in flight. All other
+routes are the same sync views the WSGI deployment runs, which Django
+executes in a thread.
+"""
+import os
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+django.setup(set_prefix=False)
+
+
+class Handler(ASGIHandler):
+    urlconf = 'core.urls_async'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+application = Handler()
+
+from api.autocomplete import warm_up  # noqa: E402
+
+warm_up()
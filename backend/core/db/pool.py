@@ -0,0 +1,235 @@
+"""
+In-process database connection pool.
+
+Stock Django opens one connection per thread and keeps it for
+CONN_MAX_AGE, so the number of Postgres connections grows with workers x
+threads. The pooled engines (core.db.postgresql, core.db.sqlite3; enabled
+with DB_POOL=1, see settings) instead borrow a connection from a bounded
+per-process pool when a thread first queries, and hand it back when Django
+closes the connection at the end of the request. Consequences:
+
+- a process never holds more than MAX_SIZE connections; a thread that
+  finds the pool exhausted waits up to TIMEOUT seconds and then gets an
+  OperationalError;
+- a connection idle for at least CHECK_AFTER seconds is pinged before it
+  is handed out, and replaced if the ping fails;
+- connections are reopened after MAX_LIFETIME seconds.
+
+`stats()` reports, per database alias, what the pool is doing (see
+DatabasePoolStatsView).
+"""
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def ping(raw):
+    """Health check for a DB-API connection; leaves no transaction open."""
+    cursor = raw.cursor()
+    try:
+        cursor.execute('SELECT 1')
+    finally:
+        cursor.close()
+    raw.rollback()
+
+
+def _discard(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=10, max_lifetime=1800, check_after=0):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._condition = threading.Condition()
+        self._idle = []      # [(raw, opened_at, returned_at)], most recently returned last
+        self._opened_at = {}  # id(raw) -> opened_at, for connections in use
+        self._size = 0       # open connections, idle or in use
+        self._waiting = 0
+        self._counters = dict.fromkeys(
+            ('checkouts', 'waits', 'timeouts', 'opened', 'closed', 'health_check_failures'), 0
+        )
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def _expired(self, opened_at, now):
+        return self.max_lifetime is not None and now - opened_at >= self.max_lifetime
+
+    def _take(self):
+        """Reserve an idle connection, or a slot to open one (returns None)."""
+        waited_since = None
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                now = time.monotonic()
+                if waited_since is None:
+                    waited_since = now
+                    self._counters['waits'] += 1
+                remaining = self.timeout - (now - waited_since)
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    self._record_wait(now - waited_since)
+                    raise PoolTimeout(
+                        f'No database connection available within {self.timeout}s '
+                        f'({self.max_size} in use)'
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if waited_since is not None:
+                self._record_wait(time.monotonic() - waited_since)
+            self._counters['checkouts'] += 1
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+            return None
+
+    def _record_wait(self, waited):
+        self._wait_time += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def _open(self):
+        try:
+            raw = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        now = time.monotonic()
+        with self._condition:
+            self._counters['opened'] += 1
+            self._opened_at[id(raw)] = now
+        return raw
+
+    def acquire(self):
+        entry = self._take()
+        if entry is None:
+            return self._open()
+
+        raw, opened_at, returned_at = entry
+        now = time.monotonic()
+        healthy = not self._expired(opened_at, now)
+        if healthy and now - returned_at >= self.check_after:
+            try:
+                ping(raw)
+            except Exception:
+                healthy = False
+                with self._condition:
+                    self._counters['health_check_failures'] += 1
+        if not healthy:
+            # Reuse the reserved slot for a fresh connection
+            _discard(raw)
+            with self._condition:
+                self._counters['closed'] += 1
+            return self._open()
+
+        with self._condition:
+            self._opened_at[id(raw)] = opened_at
+        return raw
+
+    def release(self, raw, reusable=True):
+        now = time.monotonic()
+        with self._condition:
+            opened_at = self._opened_at.pop(id(raw), now)
+            if reusable and not self._expired(opened_at, now):
+                self._idle.append((raw, opened_at, now))
+                raw = None
+            else:
+                self._size -= 1
+                self._counters['closed'] += 1
+            self._condition.notify()
+        if raw is not None:
+            _discard(raw)
+
+    def close_idle(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._counters['closed'] += len(idle)
+            self._condition.notify_all()
+        for raw, _, _ in idle:
+            _discard(raw)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._size - len(self._idle),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                **self._counters,
+                'wait_time': round(self._wait_time, 6),
+                'max_wait': round(self._max_wait, 6),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, connect):
+    """The process-wide pool for a database alias, created on first use."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = _pools[alias] = ConnectionPool(
+                connect,
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                max_lifetime=options.get('MAX_LIFETIME', 1800),
+                check_after=options.get('CHECK_AFTER', 0),
+            )
+        return pool
+
+
+def stats():
+    """{alias: pool stats} for the pools this process has opened."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    DatabaseWrapper mixin: get_new_connection() borrows from the pool and
+    _close() gives the connection back. Use with CONN_MAX_AGE=0 so every
+    request returns its connection.
+    """
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict, lambda: self.open_raw_connection(conn_params))
+        try:
+            return pool.acquire()
+        except PoolTimeout as exc:
+            # Surfaces as django.db.utils.OperationalError
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def open_raw_connection(self, conn_params):
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias, self.settings_dict, None)
+        # A connection closed mid-transaction, or one that failed and no longer answers, is not reused
+        reusable = not self.in_atomic_block and (not self.errors_occurred or self.is_usable())
+        if reusable:
+            try:
+                self.connection.rollback()
+            except self.Database.Error:
+                reusable = False
+        pool.release(self.connection, reusable)
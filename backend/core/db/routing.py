@@ -0,0 +1,183 @@
+"""
+Read replicas.
+
+With DATABASE_REPLICA_URLS set, `PrimaryReplicaRouter` sends reads made
+while serving a safe (GET/HEAD/OPTIONS) request to a replica. Everything
+else goes to `default`, the primary:
+- writes
+- select_for_update() (Django routes it as a write)
+- reads inside a transaction on the primary
+- all work outside a request: jobs, management commands, shells
+
+Replicas lag behind the primary, so a client that just wrote reads from
+the primary for REPLICA_STICKY_SECONDS afterwards.
+`PrimaryStickinessMiddleware` records a write in two ways:
+- a `primary_until` cookie, for browsers
+- a cache entry keyed by the JWT user id, for API clients, which send no
+  cookies; tokens issued within the window count as a write too (login,
+  registration)
+It runs natively under both WSGI and ASGI, so async views keep their event
+loop.
+
+Migrations only run on the primary. Replicas get the schema through
+replication: streaming replication for Postgres, or
+`manage.py sync_replicas` for local SQLite files.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PRIMARY = DEFAULT_DB_ALIAS
+COOKIE_NAME = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Whether reads may go to a replica; only the middleware turns it on
+_replica_reads = ContextVar('replica_reads', default=False)
+_jwt = JWTAuthentication()
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def reading_replicas():
+    """Whether reads in the current context may be served by a replica."""
+    return _replica_reads.get() and bool(replicas())
+
+
+@contextmanager
+def use_primary():
+    """Send reads in this block to the primary, e.g. right after a write made elsewhere."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not reading_replicas() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related lookups follow the object they start from
+            return instance._state.db
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def _user_key(user_id):
+    return f'db:primary:user:{user_id}'
+
+
+def _bearer_token(request):
+    """The validated bearer token, without loading its user."""
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    try:
+        return _jwt.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def _wrote_recently(request):
+    try:
+        if float(request.COOKIES.get(COOKIE_NAME, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    token = _bearer_token(request)
+    if token is None:
+        return False
+    # A token issued moments ago may belong to an account the replicas don't have yet
+    if token.get('iat', 0) > time.time() - sticky_seconds():
+        return True
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    return user_id is not None and cache.get(_user_key(user_id)) is not None
+
+
+class PrimaryStickinessMiddleware:
+    """Enable replica reads for safe requests unless the client wrote recently."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+
+        writing = request.method not in SAFE_METHODS
+        token = _replica_reads.set(not writing and not _wrote_recently(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+
+        key = self._remember_write(request, response) if writing else None
+        if key is not None:
+            cache.set(key, 1, timeout=sticky_seconds())
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+
+        writing = request.method not in SAFE_METHODS
+        # The ContextVar follows the request into sync_to_async views and back
+        token = _replica_reads.set(not writing and not await sync_to_async(_wrote_recently)(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+
+        key = self._remember_write(request, response) if writing else None
+        if key is not None:
+            await cache.aset(key, 1, timeout=sticky_seconds())
+        return response
+
+    def _remember_write(self, request, response):
+        """Set the stickiness cookie after a successful write; the cache key to mark for API clients, if any."""
+        if response.status_code >= 400:
+            return None
+        window = sticky_seconds()
+        response.set_cookie(
+            COOKIE_NAME, str(int(time.time() + window) + 1), max_age=window,
+            secure=request.is_secure(), httponly=True, samesite='Lax',
+        )
+        # DRF sets the authenticated user on the underlying request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return _user_key(user.pk)
+        return None
@@ -0,0 +1,213 @@
+"""
+Media delivery.
+
+`HashedMediaStorage` appends a short version to every media URL
+(`/media/products/shoe.3f2a9c1e0b7d.jpg?v=3f2a9c1e0b7d`), so a URL always
+names one exact version of a file and can be cached for a year. Files are
+hashed once, when saved, and the hash becomes part of the stored name.
+Building a URL or serving a file never reads file contents: files saved
+before names carried a hash are versioned from a stat instead.
+
+`serve_media` answers /media/ requests. With MEDIA_DELIVERY set to
+'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) it only
+checks the path and sets headers, and the front proxy sends the bytes.
+In 'django' mode it streams the file itself, with ETag/Last-Modified
+conditional responses and single-range `Range` requests.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+HASH_LENGTH = 12
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# "shoe.3f2a9c1e0b7d.jpg": the content hash HashedMediaStorage put in the name on save
+_HASHED_NAME_RE = re.compile(r'\.([0-9a-f]{%d})(?:\.[^.]+)?$' % HASH_LENGTH)
+
+
+def stored_hash(name):
+    """The content hash embedded in `name` when it was saved, or None."""
+    match = _HASHED_NAME_RE.search(posixpath.basename(name))
+    return match.group(1) if match else None
+
+
+def media_version(name, full_path, stat=None):
+    """
+    The `?v=` value for a stored file, without reading it: the hash in its
+    name, or for files saved before names carried one, a digest of its stat.
+    None if the file is missing.
+    """
+    digest = stored_hash(name)
+    if digest:
+        return digest
+    try:
+        stat = stat or os.stat(full_path)
+    except OSError:
+        return None
+    return hashlib.sha1(f'{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}'.encode()).hexdigest()[:HASH_LENGTH]
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage whose URLs carry a `?v=<version>` cache buster."""
+
+    def save(self, name, content, max_length=None):
+        # Hash once, while the content is at hand, and keep the hash in the name
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        hasher = hashlib.sha1()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        root, ext = posixpath.splitext(name)
+        hashed_name = f'{root}.{hasher.hexdigest()[:HASH_LENGTH]}{ext}'
+        if self.exists(hashed_name):
+            # Same name, same content: nothing to write
+            return hashed_name
+        return super().save(hashed_name, content, max_length)
+
+    def url(self, name):
+        url = super().url(name)
+        version = media_version(name, self.path(name)) if name else None
+        return f'{url}?v={version}' if version else url
+
+    def unversioned_url(self, name):
+        """The URL without the version, served with the default (short) cache lifetime."""
+        return super().url(name)
+
+
+def _etag(stat):
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _byte_range(request, size, etag, mtime):
+    """
+    (start, end) inclusive for a satisfiable single `Range` header, None to
+    send the whole file, or False when the range can't be satisfied.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Absent, multi-range or non-byte ranges: full response is always valid
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != int(mtime):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the last N bytes
+        length = min(int(last), size)
+        if length == 0:
+            return False
+        return size - length, size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class _RangeFile:
+    """Iterates `length` bytes of `f` from its current position."""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def __iter__(self):
+        while self.remaining > 0:
+            chunk = self.f.read(min(CHUNK_SIZE, self.remaining))
+            if not chunk:
+                break
+            self.remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.f.close()
+
+
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except Exception:
+        raise Http404('Invalid path')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    etag = _etag(stat)
+    version = request.GET.get('v')
+    immutable = version is not None and version == media_version(path, full_path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        # A stale ?v= must not be pinned for a year under the old URL
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes',
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    delivery = settings.MEDIA_DELIVERY
+    if delivery in ('x-accel-redirect', 'x-sendfile'):
+        # The proxy streams the bytes (and handles Range); we only vouch for the path
+        response = HttpResponse(content_type=content_type)
+        if delivery == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        byte_range = _byte_range(request, stat.st_size, etag, stat.st_mtime)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+        elif byte_range is None:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            f = open(full_path, 'rb')
+            f.seek(start)
+            response = StreamingHttpResponse(_RangeFile(f, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(end - start + 1)
+
+    for name, value in headers.items():
+        response[name] = value
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,167 @@
+"""
+Per-endpoint request telemetry in Prometheus format.
+
+`RequestMetricsMiddleware` labels every request with its resolved view
+(the URL name, e.g. `product-list`, or the view's dotted path) and method,
+then records:
+- latency
+- DB query count and DB time, across every database connection, including
+  the ones async views query through sync_to_async
+- response size
+- a request counter by status
+
+`metrics_view` serves them at /metrics.
+
+Under gunicorn each worker is a separate process. With
+PROMETHEUS_MULTIPROC_DIR set, prometheus_client writes samples to files in
+that directory, and /metrics sums them across workers. gunicorn.conf.py
+empties the directory when the server starts and retires the files of
+exited workers. Without it, /metrics shows only the answering process.
+The middleware runs natively under both WSGI and ASGI.
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+LABELS = ('view', 'method')
+
+REQUESTS = Counter('http_requests', 'Requests by view, method and status', LABELS + ('status',))
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to build the response', LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request', LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request', LABELS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size', LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Static files, 404s and anything else no URL pattern matched
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+def _response_size(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if not response.streaming:
+        return len(response.content)
+    return None
+
+
+# The QueryTimer of the request being served. Database connections belong to
+# a thread, and an async view's queries run on sync_to_async threads with
+# connections of their own; a ContextVar follows the request into them.
+_request_timer = ContextVar('request_timer', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install_timer(sender, connection, **kwargs):
+    if _timed_execute not in connection.execute_wrappers:
+        # First, so execute_wrapper() blocks opened around the connect still pop their own wrapper
+        connection.execute_wrappers.insert(0, _timed_execute)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed the signal
+        for connection in connections.all(initialized_only=True):
+            _install_timer(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        _record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        _record(request, response, timer, time.perf_counter() - started)
+        return response
+
+
+def _record(request, response, timer, elapsed):
+    labels = (view_label(request), request.method)
+    REQUESTS.labels(*labels, str(response.status_code)).inc()
+    LATENCY.labels(*labels).observe(elapsed)
+    DB_QUERIES.labels(*labels).observe(timer.count)
+    DB_TIME.labels(*labels).observe(timer.seconds)
+    size = _response_size(response)
+    if size is not None:
+        RESPONSE_SIZE.labels(*labels).observe(size)
+
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
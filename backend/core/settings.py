@@ -1,7 +1,9 @@
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole stack (core/metrics.py)
+    'core.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -36,6 +40,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Reads go to replicas only inside requests this enables (core/db/routing.py)
+    'core.db.routing.PrimaryStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,8 +73,84 @@ DATABASES = {
     )
 }
 
+# Read replicas (core/db/routing.py): comma-separated URLs of databases that
+# replicate `default`. Safe requests read from them unless the client wrote
+# within the last REPLICA_STICKY_SECONDS.
+DATABASE_REPLICAS = []
+for number, url in enumerate(url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url):
+    alias = f'replica{number + 1}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.db.routing.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+# Pooled connections (core/db/pool.py). With DB_POOL=True each process keeps,
+# per database, at most DB_POOL_SIZE connections whatever its thread count, so
+# Postgres sees at most WEB_CONCURRENCY x DB_POOL_SIZE from the web tier.
+# Connections go back to the pool at the end of every request, hence
+# CONN_MAX_AGE=0.
+POOLED_ENGINES = {
+    'django.db.backends.postgresql': 'core.db.postgresql',
+    'django.db.backends.sqlite3': 'core.db.sqlite3',
+}
+if os.environ.get('DB_POOL', 'False') == 'True':
+    for alias, database in DATABASES.items():
+        pooled_engine = POOLED_ENGINES.get(database['ENGINE'])
+        if pooled_engine is None:
+            raise ImproperlyConfigured(
+                f"DB_POOL=True but database '{alias}' uses {database['ENGINE']}, which has no pooled engine "
+                f"(supported: {', '.join(POOLED_ENGINES)}). Unset DB_POOL to use it without pooling."
+            )
+        database.update(
+            ENGINE=pooled_engine,
+            CONN_MAX_AGE=0,
+            POOL={
+                'MAX_SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+                # Seconds a request waits for a free connection before failing
+                'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                # Ping connections idle at least this long before handing them out (0: every checkout)
+                'CHECK_AFTER': float(os.environ.get('DB_POOL_CHECK_AFTER', 0)),
+                'MAX_LIFETIME': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            },
+        )
+
+# Shared cache so every gunicorn worker sees the same response cache and version counters.
+# Redis when REDIS_URL is set, otherwise a file cache on local disk (shared by workers on one host).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'smartshop-cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 AUTH_USER_MODEL = 'api.User'
 
+# Background jobs (api/jobs.py, `manage.py run_jobs`)
+JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', 2))
+JOBS_STALE_AFTER = int(os.environ.get('JOBS_STALE_AFTER', 1800))
+# Processes used by the worker to render product image renditions (api/images.py)
+IMAGE_PROCESSES = int(os.environ.get('IMAGE_PROCESSES', os.cpu_count() or 2))
+
+# /metrics (core/metrics.py): when set, scrapers must send `Authorization: Bearer <token>`.
+# Set PROMETHEUS_MULTIPROC_DIR in the environment to aggregate across gunicorn workers.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Query budgets on API views (api/query_budget.py): 'off', 'warn' or 'raise'
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'warn' if DEBUG else 'off')
+
+# Product search: 'auto' picks Postgres tsvector or SQLite FTS5 from the database, 'simple' uses icontains
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -96,6 +178,17 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media URLs carry a content hash (?v=...) so they can be cached as immutable
+STORAGES = {
+    'default': {'BACKEND': 'core.media.HashedMediaStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# How /media/ bytes are sent: 'django' streams them from the app (Range and
+# conditional requests supported), 'x-accel-redirect' hands them to nginx via
+# an internal location at MEDIA_ACCEL_PREFIX, 'x-sendfile' to Apache/lighttpd
+MEDIA_DELIVERY = os.environ.get('MEDIA_DELIVERY', 'django')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.views.static import serve
 
 from django.http import JsonResponse
 
+from core.media import serve_media
+from core.metrics import metrics_view
+
 def root_view(request):
     return JsonResponse({"message": "Welcome to SmartShop API"})
 
@@ -12,6 +14,7 @@ urlpatterns = [
     path('', root_view),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    # Serve media files in both dev and production
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    path('metrics', metrics_view, name='metrics'),
+    # Media in both dev and production; see core/media.py for proxy offloading
+    re_path(r'^media/(?P<path>.*)$', serve_media),
 ]
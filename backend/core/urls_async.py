@@ -0,0 +1,19 @@
+"""
+URLconf for the ASGI entry point: async catalog reads (api/async_views.py)
+ahead of the regular routes, which serve everything else. Routes carry
+the router's names, so metrics label them the same in both modes.
+"""
+from django.urls import path
+
+from api import async_views
+from core.urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('api/products/', async_views.product_list, name='product-list'),
+    path('api/products/search/', async_views.product_search, name='product-search'),
+    path('api/products/suggestions/', async_views.product_suggestions, name='product-suggestions'),
+    path('api/products/<uuid:pk>/', async_views.product_detail, name='product-detail'),
+    path('api/categories/', async_views.category_list, name='categories-list'),
+    path('api/pages/', async_views.page_list, name='pagecontent-list'),
+    path('api/pages/<slug:slug>/', async_views.page_detail, name='pagecontent-detail'),
+] + wsgi_urlpatterns
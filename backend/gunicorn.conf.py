@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for both deployment modes.
+
+SERVER_MODE=wsgi (default) runs core.wsgi on sync workers. SERVER_MODE=asgi
+runs core.asgi on uvicorn workers, where catalog reads are async views
+(see core/urls_async.py). Compare the two with `manage.py bench_asgi`.
+
+With PROMETHEUS_MULTIPROC_DIR set, workers write request metrics there and
+/metrics aggregates them (core/metrics.py); the hooks below keep the
+directory to the current server's live workers.
+"""
+import os
+import shutil
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'core.wsgi:application'
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        # Samples from a previous run would be summed into the new one
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -52,11 +52,19 @@ export const ProductCard: React.FC<ProductCardProps> = ({ product, index = 0 })
 
           {/* Image Container */}
           <div className="relative aspect-[3/4] overflow-hidden bg-secondary dark:bg-gray-700">
-            <img
-              src={product.imageUrl}
-              alt={product.name}
-              className="h-full w-full object-cover transition-transform duration-700 group-hover:scale-110"
-            />
+            <picture className="block h-full w-full">
+              {product.imageSrcSet && (
+                <source type="image/webp" srcSet={product.imageSrcSet.webp} sizes="(min-width: 1024px) 25vw, 50vw" />
+              )}
+              <img
+                src={product.imageSrcSet?.src || product.imageUrl}
+                srcSet={product.imageSrcSet?.jpeg}
+                sizes="(min-width: 1024px) 25vw, 50vw"
+                loading="lazy"
+                alt={product.name}
+                className="h-full w-full object-cover transition-transform duration-700 group-hover:scale-110"
+              />
+            </picture>
 
             {/* Overlay Gradient */}
             <div className="absolute inset-0 bg-gradient-to-t from-black/20 to-transparent opacity-0 group-hover:opacity-100 transition-opacity duration-300" />
@@ -103,11 +111,13 @@ export const ProductCard: React.FC<ProductCardProps> = ({ product, index = 0 })
               {product.name}
             </h3>
 
-            {/* Rating Placeholder (if reviews exist) */}
-            <div className="flex items-center gap-1 mb-2">
-              <Star className="w-3 h-3 text-yellow-400 fill-yellow-400" />
-              <span className="text-xs text-zinc-500 font-medium dark:text-gray-400">4.8 (120)</span>
-            </div>
+            {/* Rating (stored on the product, no review fetch) */}
+            {product.ratingCount ? (
+              <div className="flex items-center gap-1 mb-2">
+                <Star className="w-3 h-3 text-yellow-400 fill-yellow-400" />
+                <span className="text-xs text-zinc-500 font-medium dark:text-gray-400">{product.ratingAvg?.toFixed(1)} ({product.ratingCount})</span>
+              </div>
+            ) : null}
 
             <div className="mt-auto pt-3 flex items-center justify-between border-t border-gray-50 dark:border-gray-700">
               <div className="flex flex-col">
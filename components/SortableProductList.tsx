@@ -26,7 +26,7 @@ interface SortableProductListProps {
     saving?: boolean;
 }
 
-const SortableItem = ({ product }: { product: Product }) => {
+const SortableItem = ({ product, position }: { product: Product; position: number }) => {
     const {
         attributes,
         listeners,
@@ -59,7 +59,7 @@ const SortableItem = ({ product }: { product: Product }) => {
                 <div className="text-xs text-gray-500">${product.price}</div>
             </div>
             <div className="px-3 py-1 bg-gray-100 rounded text-xs font-bold text-gray-600">
-                Order: {product.display_order ?? 0}
+                Order: {position}
             </div>
         </div>
     );
@@ -80,15 +80,8 @@ export const SortableProductList: React.FC<SortableProductListProps> = ({ produc
             const oldIndex = products.findIndex((p) => p.id === active.id);
             const newIndex = products.findIndex((p) => p.id === over.id);
 
-            const newOrder = arrayMove(products, oldIndex, newIndex);
-
-            // Update display_order property based on new index
-            const updatedOrder = newOrder.map((p, index) => ({
-                ...p,
-                display_order: index
-            }));
-
-            onReorder(updatedOrder);
+            // Ranks are assigned by the server on save
+            onReorder(arrayMove(products, oldIndex, newIndex));
         }
     };
 
@@ -118,8 +111,8 @@ export const SortableProductList: React.FC<SortableProductListProps> = ({ produc
                     strategy={verticalListSortingStrategy}
                 >
                     <div className="space-y-2">
-                        {products.map((product) => (
-                            <SortableItem key={product.id} product={product} />
+                        {products.map((product, index) => (
+                            <SortableItem key={product.id} product={product} position={index + 1} />
                         ))}
                     </div>
                 </SortableContext>
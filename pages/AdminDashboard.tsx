@@ -95,13 +95,10 @@ export const AdminDashboard = () => {
   const handleReorderSave = async () => {
     setSavingReorder(true);
     try {
-      const itemsToUpdate = products.map((p, index) => ({
-        id: p.id,
-        display_order: index
-      }));
-      await api.reorderProducts(itemsToUpdate);
+      const { ranks } = await api.reorderProducts(products.map(p => p.id));
+      // Keep local ranks in sync with the sparse ranks the server assigned
+      setProducts(products.map(p => ({ ...p, display_order: ranks[p.id] ?? p.display_order })));
       setIsReordering(false);
-      // No need to reload, local state is already updated by the drag component
     } catch (e) {
       console.error(e);
       alert('Failed to save order');
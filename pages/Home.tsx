@@ -31,21 +31,16 @@ export const Home = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [featured, popular, cats, allProducts] = await Promise.all([
-          api.getProducts({ isFeatured: true }),
-          api.getProducts({ isPopular: true }),
+        const [featured, popular, cats, flashSales] = await Promise.all([
+          api.getProducts({ isFeatured: true, view: 'card' }),
+          api.getProducts({ isPopular: true, view: 'card' }),
           api.getCategories(),
-          api.getProducts({}) // Fetch all to find flash sales
+          api.getProducts({ flashSale: true, view: 'card' }) // Running flash sales only
         ]);
         setFeaturedProducts(featured.slice(0, 8)); // Show more items
         setPopularProducts(popular.slice(0, 4));
         setCategories(cats);
 
-        // Flash Sale Logic: Find products with active future end time
-        const now = new Date();
-        const flashSales = allProducts.filter(p =>
-          p.flashSaleEnd && new Date(p.flashSaleEnd) > now
-        );
         setFlashSaleProducts(flashSales);
 
         if (flashSales.length > 0) {
@@ -55,8 +55,8 @@ export const ProductDetail = () => {
 
                     // Check Wishlist
                     if (user) {
-                        const wishlist = await api.getWishlist();
-                        setInWishlist(wishlist.some(p => p.id === data.id));
+                        const wishlisted = await api.wishlistContains([data.id]);
+                        setInWishlist(wishlisted.has(data.id));
 
                         // Check purchase for review permission
                         const orders = await api.getRecentOrders();
@@ -90,7 +90,7 @@ export const ProductDetail = () => {
             const stockLimit = variant ? variant.stock : product.stock;
             // Add 'quantity' times
             for (let i = 0; i < quantity; i++) {
-                addToCart({ ...product, stock: stockLimit });
+                addToCart({ ...product, stock: stockLimit, variantSku: variant?.sku });
             }
         }
     };
@@ -35,7 +35,7 @@ export const ProductList = () => {
     setLoading(true);
     try {
       // Convert string params to correct types for API
-      const validSorts = ['price_asc', 'price_desc', 'newest'];
+      const validSorts = ['price_asc', 'price_desc', 'newest', 'rating'];
       const sort = validSorts.includes(filters.sort)
         ? (filters.sort as ProductFilter['sort'])
         : undefined;
@@ -47,18 +47,10 @@ export const ProductList = () => {
         isFeatured: filters.isFeatured === 'true' ? true : (filters.isFeatured === 'false' ? false : undefined),
         isPopular: filters.isPopular === 'true' ? true : (filters.isPopular === 'false' ? false : undefined),
         sort,
+        view: 'card',
       };
 
-      let productsData = await api.getProducts(apiFilters);
-
-      // Client-side filtering for Flash Sales
-      if (filters.flashSale) {
-        const now = new Date();
-        productsData = productsData.filter(p =>
-          p.flashSaleEnd && new Date(p.flashSaleEnd) > now
-        );
-      }
-
+      const productsData = await api.getProducts(apiFilters);
       setProducts(productsData);
     } catch (err) {
       console.error(err);
@@ -126,6 +118,7 @@ export const ProductList = () => {
               <option value="newest">Sort by: Newest</option>
               <option value="price_asc">Price: Low to High</option>
               <option value="price_desc">Price: High to Low</option>
+              <option value="rating">Top Rated</option>
             </select>
           </div>
 
@@ -82,15 +82,8 @@ export const UserProfile = () => {
             data.append('bio', formData.bio);
 
             if (profileImage) {
-                // Convert to Base64
-                const reader = new FileReader();
-                reader.readAsDataURL(profileImage);
-                await new Promise((resolve) => {
-                    reader.onloadend = () => {
-                        data.append('profile_picture', reader.result as string);
-                        resolve(null);
-                    };
-                });
+                // Uploaded as a file; the server stores resized copies and returns their URLs
+                data.append('avatar', profileImage);
             }
 
             const updatedUser = await api.updateProfile(data);
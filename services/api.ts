@@ -93,6 +93,7 @@ const mapProduct = (p: any): Product => ({
   subcategory: p.subcategory,
   brand: p.brand,
   imageUrl: getAbsoluteUrl(p.image || p.image_url), // Handle both keys and ensure absolute
+  imageSrcSet: p.image_srcset || undefined,
   additionalImages: (p.additional_images || []).map(getAbsoluteUrl), // Handle additional images too
   stock: p.stock_quantity,
   gender: p.gender,
@@ -105,11 +106,15 @@ const mapProduct = (p: any): Product => ({
   createdAt: p.created_at,
   discountPercentage: p.discount_percentage,
   salePrice: p.sale_price ? parseFloat(p.sale_price) : undefined,
+  effectivePrice: p.effective_price ? parseFloat(p.effective_price) : undefined,
   cogs: p.cogs ? parseFloat(p.cogs) : undefined,
   marketingCost: p.marketing_cost ? parseFloat(p.marketing_cost) : undefined,
   shippingCost: p.shipping_cost ? parseFloat(p.shipping_cost) : undefined,
   flashSaleStart: p.flash_sale_start,
   flashSaleEnd: p.flash_sale_end,
+  ratingAvg: p.rating_avg !== undefined ? parseFloat(p.rating_avg) : undefined,
+  ratingCount: p.rating_count,
+  ratingHistogram: p.rating_histogram,
 });
 
 const mapOrder = (o: any): Order => ({
@@ -341,17 +346,20 @@ export const api = {
     if (filters.sellerId) params.seller = filters.sellerId;
     if (filters.search) params.search = filters.search;
     if (filters.onSale) params.on_sale = 'true';
+    if (filters.flashSale) params.flash_sale = 'true';
 
     if (filters.minPrice !== undefined) params.min_price = filters.minPrice;
     if (filters.maxPrice !== undefined) params.max_price = filters.maxPrice;
 
     if (filters.isFeatured !== undefined) params.is_featured = filters.isFeatured;
     if (filters.isPopular !== undefined) params.is_popular = filters.isPopular;
+    if (filters.view) params.view = filters.view;
 
     if (filters.sort) {
-      if (filters.sort === 'price_asc') params.ordering = 'price';
-      else if (filters.sort === 'price_desc') params.ordering = '-price';
+      if (filters.sort === 'price_asc') params.ordering = 'effective_price';
+      else if (filters.sort === 'price_desc') params.ordering = '-effective_price';
       else if (filters.sort === 'newest') params.ordering = '-created_at';
+      else if (filters.sort === 'rating') params.ordering = '-rating_avg,-rating_count';
     }
 
     const response = await client.get('/products/', { params });
@@ -432,7 +440,16 @@ export const api = {
     const response = await client.post('/products/bulk_upload/', formData, {
       headers: { 'Content-Type': 'multipart/form-data' }
     });
-    return response.data;
+    // The import runs in the background worker; poll the job until it finishes
+    let job = response.data.job;
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      job = (await client.get(`/jobs/${job.id}/`)).data;
+    }
+    if (job.status === 'failed') {
+      return { message: 'Bulk upload failed.', errors: [job.last_error?.trim().split('\n').pop() || 'Unknown error'] };
+    }
+    return job.result;
   },
 
   client,
@@ -478,8 +495,9 @@ export const api = {
     return mapProduct(response.data);
   },
 
-  reorderProducts: async (items: { id: string; display_order: number }[]) => {
-    const response = await client.post('/products/reorder/', { items });
+  // Sends the new order of the list; the server only rewrites the products that moved
+  reorderProducts: async (productIds: string[]): Promise<{ updated: number; ranks: Record<string, number> }> => {
+    const response = await client.post('/products/reorder/', { order: productIds });
     return response.data;
   },
 
@@ -487,29 +505,27 @@ export const api = {
     await client.delete(`/products/${id}/`);
   },
 
+  getFacets: async (filters: Record<string, any> = {}) => {
+    const response = await client.get('/products/facets/', { params: filters });
+    return response.data;
+  },
+
   getCategories: async (): Promise<string[]> => {
-    const response = await client.get('/products/');
-    const products = response.data;
-    const categories = new Set(products.map((p: any) => p.category));
-    return Array.from(categories) as string[];
+    const response = await client.get('/products/facets/');
+    return response.data.categories.map((c: any) => c.value);
   },
 
   getBrands: async (): Promise<string[]> => {
-    const response = await client.get('/products/');
-    const products = response.data;
-    const brands = new Set(products.map((p: any) => p.brand));
-    return Array.from(brands) as string[];
+    const response = await client.get('/products/facets/');
+    return response.data.brands.map((b: any) => b.value);
   },
 
   getSubcategories: async (category?: string): Promise<string[]> => {
-    const response = await client.get('/products/');
-    const products = response.data;
+    const response = await client.get('/products/facets/');
     const subcats = new Set<string>();
-    products.forEach((p: any) => {
-      if (p.subcategory) {
-        if (!category || p.category === category) {
-          subcats.add(p.subcategory);
-        }
+    response.data.categories.forEach((c: any) => {
+      if (!category || c.value === category) {
+        c.subcategories.forEach((s: any) => subcats.add(s.value));
       }
     });
     return Array.from(subcats) as string[];
@@ -560,7 +576,7 @@ export const api = {
   // --- Orders ---
   createOrder: async (orderData: { items: any[], shippingAddress: any, paymentDetails: any, totalPrice: number }): Promise<Order> => {
     const payload = {
-      items: orderData.items.map(i => ({ id: i.id, quantity: i.quantity, price: i.price })),
+      items: orderData.items.map(i => ({ id: i.id, quantity: i.quantity, price: i.price, sku: i.variantSku })),
       totalPrice: orderData.totalPrice,
       customerName: orderData.shippingAddress.name,
     };
@@ -683,6 +699,26 @@ export const api = {
     }
   },
 
+  getWishlistIds: async (): Promise<string[]> => {
+    try {
+      const response = await client.get('/wishlist/', { params: { view: 'ids' } });
+      return response.data;
+    } catch (e) {
+      return [];
+    }
+  },
+
+  // Wishlisted subset of productIds, in one request for a whole grid
+  wishlistContains: async (productIds: string[]): Promise<Set<string>> => {
+    if (productIds.length === 0) return new Set();
+    try {
+      const response = await client.post('/wishlist/contains/', { product_ids: productIds });
+      return new Set<string>(response.data.product_ids);
+    } catch (e) {
+      return new Set();
+    }
+  },
+
   toggleWishlist: async (productId: string): Promise<boolean> => {
     // Returns true if added, false if removed
     const response = await client.post('/wishlist/toggle/', { product_id: productId });
@@ -35,6 +35,13 @@ export interface AuthResponse {
     token: string;
 }
 
+// Resized renditions of a product image; absent until the worker has rendered them
+export interface ImageSrcSet {
+    src: string;
+    webp: string;
+    jpeg: string;
+}
+
 export interface Product {
     id: string;
     name: string;
@@ -44,6 +51,7 @@ export interface Product {
     subcategory?: string;
     brand: string;
     imageUrl: string;
+    imageSrcSet?: ImageSrcSet;
     additionalImages?: string[];
     stock: number;
     gender?: string;
@@ -52,11 +60,16 @@ export interface Product {
     isFeatured?: boolean;
     isPopular?: boolean;
     variants?: any[];
+    variantSku?: string; // Variant chosen when the product was added to the cart
     userId: string; // Seller ID
     createdAt: string;
     discountPercentage?: number;
     salePrice?: number;
+    effectivePrice?: number; // Price the customer pays right now (sale price while a sale runs)
     display_order?: number;
+    ratingAvg?: number;
+    ratingCount?: number;
+    ratingHistogram?: Record<string, number>; // Star ("1".."5") -> review count
 
     // Cost fields
     cogs?: number;
@@ -87,11 +100,13 @@ export interface ProductFilter {
     sellerId?: string;
     search?: string;
     onSale?: boolean;
+    flashSale?: boolean;
     minPrice?: number;
     maxPrice?: number;
     isFeatured?: boolean; // Using 'isFeatured' for consistency
     isPopular?: boolean;
     sort?: string;
+    view?: 'card'; // Slim grid projection (skips description, variants, internal costs)
 }
 
 export interface Order {